@@ -0,0 +1,171 @@
+
+# Replays a .pgn file move by move and measures how long every phase of the interpreter takes
+# Moves are played by game.make_turn, like --validate and --export do, including the move cache and the game history
+# The cache is cleared first, so the results don't depend on what was replayed before
+# Use --profile for the time spent in the functions make_turn calls
+
+import os
+import sys
+import json
+import time
+import platform
+
+import game
+import move
+import input_parser
+
+from types import ModuleType
+from typing import Callable, Optional
+
+
+BENCH_FILE: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'data', 'Adams.pgn')
+BENCH_THRESHOLD: float = 0.1 # 10% slower than the baseline is a regression
+
+# parse_and_complete doesn't include verify_meta, history is the rest of make_turn (snapshots, encoding the move, ...)
+PHASES: tuple[str, ...] = ('read', 'extract_moves', 'parse_and_complete', 'verify_meta', 'execute_a_move', 'history')
+
+# (phase, module, function) - make_turn calls them through their modules, so replacing them times the real replay
+TIMED_FUNCTIONS: tuple[tuple[str, ModuleType, str], ...] = (
+	('parse_and_complete', input_parser, 'parse_and_complete'),
+	('verify_meta', input_parser, 'verify_meta'),
+	('execute_a_move', move, 'execute_a_move'),
+)
+
+BenchResult = dict # JSON serialisable, see run_benchmark
+
+
+def timed(function: Callable, phases: dict[str, float], phase: str) -> Callable:
+
+	clock = time.perf_counter
+
+	def wrapper(*args, **kwargs):
+		start = clock()
+		try:
+			return function(*args, **kwargs)
+		finally:
+			phases[phase] += clock() - start
+
+	return wrapper
+
+
+def run_benchmark(path: str = BENCH_FILE, max_games: Optional[int] = None) -> BenchResult:
+	"Can throw exceptions"
+
+	phases = dict.fromkeys(PHASES, 0.0)
+	turns = 0.0 # the whole make_turn
+	games = 0
+	moves = 0
+	invalid = 0
+
+	clock = time.perf_counter
+
+	input_parser.MOVE_CACHE.clear()
+
+	originals = [(module, name, getattr(module, name)) for _, module, name in TIMED_FUNCTIONS]
+
+	for phase, module, name in TIMED_FUNCTIONS:
+		setattr(module, name, timed(getattr(module, name), phases, phase))
+
+	start = clock()
+
+	try:
+		with game.PgnFile(path) as pgn_file:
+
+			count = len(pgn_file) if max_games is None else min(max_games, len(pgn_file))
+
+			for i in range(count):
+
+				t = clock()
+				data = pgn_file.get_game_data(i)
+				t2 = clock()
+				game_moves = game.extract_moves(data)
+				t3 = clock()
+
+				phases['read'] += t2 - t
+				phases['extract_moves'] += t3 - t2
+
+				games += 1
+
+				if isinstance(game_moves, Exception):
+					invalid += 1
+					continue
+
+				g = game.Game()
+
+				t = clock()
+
+				for move_input in game_moves:
+					if isinstance(game.make_turn(g, move_input), Exception):
+						invalid += 1
+						break
+
+				turns += clock() - t
+				moves += g.get_ply_count()
+	finally:
+		for module, name, function in originals:
+			setattr(module, name, function)
+
+	elapsed = clock() - start
+
+	# the timed functions are nested - verify_meta is called by parse_and_complete
+	phases['history'] = turns - phases['parse_and_complete'] - phases['execute_a_move']
+	phases['parse_and_complete'] -= phases['verify_meta']
+
+	return {
+		'file': os.path.basename(path),
+		'python': platform.python_version(),
+		'games': games,
+		'invalid_games': invalid,
+		'moves': moves,
+		'seconds': elapsed,
+		'games_per_second': games / elapsed if elapsed else 0.0,
+		'moves_per_second': moves / elapsed if elapsed else 0.0,
+		'phases': phases,
+	}
+
+
+def compare_results(result: BenchResult, baseline: BenchResult, threshold: float = BENCH_THRESHOLD) -> list[str]:
+	"Returns a message for every metric, that got worse than the baseline by more than the threshold"
+
+	regressions = []
+
+	for key in ('games_per_second', 'moves_per_second'):
+		old, new = baseline.get(key), result.get(key)
+		if old and new is not None and new < old * (1 - threshold):
+			regressions.append(f'{key}: {new:.1f} (baseline {old:.1f}, {new / old - 1:+.1%})')
+
+	# phases are compared per move, so runs over a different number of games can be compared too
+	old_moves, new_moves = baseline.get('moves'), result['moves']
+
+	for phase, old in baseline.get('phases', {}).items():
+		new = result['phases'].get(phase)
+		if not old or not old_moves or not new_moves or new is None:
+			continue
+
+		old, new = old / old_moves, new / new_moves
+		if new > old * (1 + threshold):
+			regressions.append(f'{phase}: {new * 1e6:.1f}us/move (baseline {old * 1e6:.1f}us/move, {new / old - 1:+.1%})')
+
+	return regressions
+
+
+def print_result(result: BenchResult, file=sys.stdout) -> None:
+
+	print(f'Replayed {result["games"]} games ({result["invalid_games"]} invalid), {result["moves"]} moves in {result["seconds"]:.2f}s', file=file)
+	print(f'{result["games_per_second"]:.1f} games/s, {result["moves_per_second"]:.1f} moves/s', file=file)
+	print('Phases:', file=file)
+
+	for phase, seconds in sorted(result['phases'].items(), key=lambda item: item[1], reverse=True):
+		share = seconds / result['seconds'] if result['seconds'] else 0.0
+		print(f'\t{phase:<20} {seconds:8.3f}s {share:6.1%}', file=file)
+
+
+def save_result(result: BenchResult, path: str) -> None:
+	with open(path, 'w') as file:
+		json.dump(result, file, indent='\t')
+
+
+def load_result(path: str) -> BenchResult:
+	"Can throw exceptions"
+	with open(path, 'r') as file:
+		return json.load(file)
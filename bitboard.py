@@ -0,0 +1,469 @@
+# Bitboards - sets of squares stored as 64 bit integers, bit (y * 8 + x) stands for (x, y)
+# Board keeps one bitboard per encoded piece (Board.bitboards) and one per color (Board.occupancy)
+
+from data_types import Piece, Board, Position
+
+from typing import Optional
+
+
+SIZE: int = Board.SIZE
+
+# (dx, dy), order matters - the first 4 are perpendicular, the last 4 are diagonal
+DIRECTIONS: tuple[tuple[int, int], ...] = (
+	(-1, 0), (1, 0), (0, -1), (0, 1),
+	(-1, -1), (-1, 1), (1, -1), (1, 1),
+)
+PERPENDICULAR_DIRECTIONS: tuple[int, ...] = (0, 1, 2, 3)
+DIAGONAL_DIRECTIONS: tuple[int, ...] = (4, 5, 6, 7)
+
+KNIGHT_OFFSETS: tuple[tuple[int, int], ...] = (
+	(-2, -1), (-2, 1),
+	(-1, -2), (1, -2),
+	(2, -1), (2, 1),
+	(1, 2), (-1, 2),
+)
+
+
+def _on_board(x: int, y: int) -> bool:
+	return 0 <= x < SIZE and 0 <= y < SIZE
+
+
+def _jumps(offsets: tuple[tuple[int, int], ...]) -> list[int]:
+	"For every square returns a bitboard of squares at the offsets"
+
+	ret = []
+
+	for square in range(SIZE * SIZE):
+		x, y = Board.from_square(square)
+		bits = 0
+		for dx, dy in offsets:
+			if _on_board(x + dx, y + dy):
+				bits |= 1 << Board.to_square(x + dx, y + dy)
+		ret.append(bits)
+
+	return ret
+
+
+def _rays() -> list[list[int]]:
+	"RAYS[direction][square] - all squares from square (exclusive) to the edge of the board"
+
+	ret = []
+
+	for dx, dy in DIRECTIONS:
+		rays = []
+		for square in range(SIZE * SIZE):
+			x, y = Board.from_square(square)
+			bits = 0
+			while _on_board(x + dx, y + dy):
+				x += dx
+				y += dy
+				bits |= 1 << Board.to_square(x, y)
+			rays.append(bits)
+		ret.append(rays)
+
+	return ret
+
+
+def _targets(bitboards: list[int]) -> tuple[tuple[int, ...], ...]:
+	"The same squares as the bitboards, as tuples of square indexes"
+	return tuple(tuple(square for square in range(SIZE * SIZE) if bits >> square & 1) for bits in bitboards)
+
+
+def _ray_squares() -> tuple[tuple[tuple[int, ...], ...], ...]:
+	"RAY_SQUARES[direction][square] - squares from square (exclusive) to the edge of the board, nearest first"
+
+	ret = []
+
+	for dx, dy in DIRECTIONS:
+		rays = []
+		for square in range(SIZE * SIZE):
+			x, y = Board.from_square(square)
+			ray = []
+			while _on_board(x + dx, y + dy):
+				x += dx
+				y += dy
+				ray.append(Board.to_square(x, y))
+			rays.append(tuple(ray))
+		ret.append(tuple(rays))
+
+	return tuple(ret)
+
+
+KNIGHT_ATTACKS: list[int] = _jumps(KNIGHT_OFFSETS)
+KING_ATTACKS: list[int] = _jumps(tuple((dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy))
+# PAWN_ATTACKS[is_white][square], white pawns move towards y = 0
+PAWN_ATTACKS: tuple[list[int], list[int]] = (_jumps(((-1, 1), (1, 1))), _jumps(((-1, -1), (1, -1))))
+
+RAYS: list[list[int]] = _rays()
+
+# the same tables as lists of squares, for code walking over squares one by one
+DIRECTION_INDEX: dict[tuple[int, int], int] = {direction: i for i, direction in enumerate(DIRECTIONS)}
+RAY_SQUARES: tuple[tuple[tuple[int, ...], ...], ...] = _ray_squares()
+KNIGHT_TARGETS: tuple[tuple[int, ...], ...] = _targets(KNIGHT_ATTACKS)
+KING_TARGETS: tuple[tuple[int, ...], ...] = _targets(KING_ATTACKS)
+# a ray's first blocker is its lowest bit for directions going towards higher squares and the highest bit otherwise
+IS_DIRECTION_POSITIVE: tuple[bool, ...] = tuple(dy * SIZE + dx > 0 for dx, dy in DIRECTIONS)
+
+
+def _between() -> list[list[int]]:
+	"BETWEEN[square][square2] - squares strictly between two squares on a line, 0 if they aren't on one"
+
+	ret = [[0] * (SIZE * SIZE) for _ in range(SIZE * SIZE)]
+
+	for rays in RAY_SQUARES:
+		for square, ray in enumerate(rays):
+			bits = 0
+			for square2 in ray:
+				ret[square][square2] = bits
+				bits |= 1 << square2
+
+	return ret
+
+
+BETWEEN: list[list[int]] = _between()
+ALL_SQUARES: int = (1 << (SIZE * SIZE)) - 1
+
+
+def get_first_blocker(blockers: int, direction: int) -> int:
+	"The square of the nearest blocker on a ray going in the direction, blockers can't be 0"
+
+	if IS_DIRECTION_POSITIVE[direction]:
+		return (blockers & -blockers).bit_length() - 1
+
+	return blockers.bit_length() - 1
+
+
+def get_ray_attacks(square: int, direction: int, occupied: int) -> int:
+	"Squares attacked by a slider in one direction, including the first blocker"
+
+	ray = RAYS[direction][square]
+	blockers = ray & occupied
+
+	if blockers:
+		ray ^= RAYS[direction][get_first_blocker(blockers, direction)]
+
+	return ray
+
+
+def get_slider_attacks(square: int, directions: tuple[int, ...], occupied: int) -> int:
+	ret = 0
+	for direction in directions:
+		ret |= get_ray_attacks(square, direction, occupied)
+	return ret
+
+
+def get_attackers(board: Board, square: int, by_white: bool, occupied: Optional[int] = None) -> int:
+	"""Bitboard of by_white pieces, that attack the square (whether or not it's occupied).
+	occupied replaces the board's occupancy for sliders, eg. to look through a piece"""
+
+	color = Board.COLOR_WHITE if by_white else 0
+	bitboards = board.bitboards
+
+	if occupied is None:
+		occupied = board.occupancy[0] | board.occupancy[1]
+
+	ret = KNIGHT_ATTACKS[square] & bitboards[Piece.TYPE_KNIGHT | color]
+	ret |= KING_ATTACKS[square] & bitboards[Piece.TYPE_KING | color]
+	# a pawn attacks the square, if a pawn of the other color on the square would attack the pawn
+	ret |= PAWN_ATTACKS[not by_white][square] & bitboards[Piece.TYPE_PAWN | color]
+
+	queens = bitboards[Piece.TYPE_QUEEN | color]
+
+	rooks = bitboards[Piece.TYPE_ROOK | color] | queens
+	if rooks:
+		ret |= get_slider_attacks(square, PERPENDICULAR_DIRECTIONS, occupied) & rooks
+
+	bishops = bitboards[Piece.TYPE_BISHOP | color] | queens
+	if bishops:
+		ret |= get_slider_attacks(square, DIAGONAL_DIRECTIONS, occupied) & bishops
+
+	return ret
+
+
+def is_square_attacked(board: Board, square: int, by_white: bool) -> bool:
+	"Matches the mask engine - squares occupied by by_white pieces don't count as attacked"
+
+	if board.occupancy[by_white] >> square & 1:
+		return False
+
+	if board.attack_maps is not None:
+		return board.attack_maps.is_attacked(square, by_white)
+
+	return get_attackers(board, square, by_white) != 0
+
+
+class CheckInfo:
+	"King safety of one side in a position. Pieces are described by their squares"
+
+	__slots__ = ('is_white', 'king', 'checkers', 'evasions', 'pins')
+
+	def __init__(self, is_white: bool, king: int, checkers: int, evasions: int, pins: dict[int, int]) -> None:
+		self.is_white: bool = is_white
+		self.king: int = king
+		self.checkers: int = checkers # bitboard of the enemy pieces checking the king
+		# squares, that other pieces can move to - all of them without a check, none in a double check,
+		# otherwise the checking piece and the squares between it and the king
+		self.evasions: int = evasions
+		self.pins: dict[int, int] = pins # pinned piece -> squares it can move to (towards the pinning piece, including it)
+
+	def is_check(self) -> bool:
+		return self.checkers != 0
+
+	def is_double_check(self) -> bool:
+		return self.checkers & (self.checkers - 1) != 0
+
+
+def compute_check_info(board: Board, is_white: bool) -> CheckInfo:
+
+	color = Board.COLOR_WHITE if is_white else 0
+	enemy_color = color ^ Board.COLOR_WHITE
+	bitboards = board.bitboards
+
+	king_bits = bitboards[Piece.TYPE_KING | color]
+	assert king_bits, "There is no king on the board"
+	king = king_bits.bit_length() - 1
+
+	own = board.occupancy[is_white]
+	occupied = own | board.occupancy[not is_white]
+
+	checkers = KNIGHT_ATTACKS[king] & bitboards[Piece.TYPE_KNIGHT | enemy_color]
+	checkers |= PAWN_ATTACKS[is_white][king] & bitboards[Piece.TYPE_PAWN | enemy_color]
+
+	pins: dict[int, int] = {}
+
+	queens = bitboards[Piece.TYPE_QUEEN | enemy_color]
+	rooks = bitboards[Piece.TYPE_ROOK | enemy_color] | queens
+	bishops = bitboards[Piece.TYPE_BISHOP | enemy_color] | queens
+
+	for direction in range(len(DIRECTIONS)):
+		sliders = rooks if direction < 4 else bishops
+		ray = RAYS[direction][king]
+
+		if not ray & sliders:
+			continue
+
+		blockers = ray & occupied
+		first = get_first_blocker(blockers, direction)
+
+		if sliders >> first & 1:
+			checkers |= 1 << first
+
+		elif own >> first & 1:
+			blockers ^= 1 << first
+			if blockers:
+				second = get_first_blocker(blockers, direction)
+				if sliders >> second & 1:
+					pins[first] = BETWEEN[king][second] | 1 << second
+
+	if not checkers:
+		evasions = ALL_SQUARES
+	elif checkers & (checkers - 1):
+		evasions = 0
+	else:
+		checker = checkers.bit_length() - 1
+		evasions = checkers | BETWEEN[king][checker]
+
+	return CheckInfo(is_white, king, checkers, evasions, pins)
+
+
+_check_info_cache: dict[tuple[int, bool], CheckInfo] = {}
+
+def get_check_info(board: Board, is_white: bool) -> CheckInfo:
+	"Cached by the zobrist key, so it's computed once per position"
+
+	key = (board.zobrist_key, is_white)
+	info = _check_info_cache.get(key)
+
+	if info is None:
+		if len(_check_info_cache) >= 4096:
+			_check_info_cache.clear()
+
+		info = _check_info_cache[key] = compute_check_info(board, is_white)
+
+	return info
+
+
+def is_legal_move(board: Board, info: CheckInfo, square: int, square2: int) -> bool:
+	"""Whether a pseudo legal move of info's side leaves its king safe.
+	WARNING: doesn't cover castling and en passant captures"""
+
+	if square == info.king:
+		if not info.checkers and board.attack_maps is not None:
+			# no slider's ray passes through the king, so moving it away doesn't uncover any attacks
+			return not board.attack_maps.is_attacked(square2, not info.is_white)
+
+		# sliders attack through the king's old square
+		occupied = (board.occupancy[0] | board.occupancy[1]) ^ (1 << square)
+		return get_attackers(board, square2, not info.is_white, occupied) == 0
+
+	bit = 1 << square2
+
+	if not info.evasions & bit:
+		return False
+
+	pin = info.pins.get(square)
+
+	return pin is None or pin & bit != 0
+
+
+# DIRECTIONS[OPPOSITE_DIRECTIONS[i]] == -DIRECTIONS[i]
+OPPOSITE_DIRECTIONS: tuple[int, ...] = tuple(DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS)
+
+# (direction, RAYS[direction], RAYS of the opposite direction, IS_DIRECTION_POSITIVE[direction])
+SLIDER_UPDATE_RAYS: tuple[tuple[int, list[int], list[int], bool], ...] = tuple(
+	(direction, RAYS[direction], RAYS[OPPOSITE_DIRECTIONS[direction]], IS_DIRECTION_POSITIVE[direction])
+	for direction in range(len(DIRECTIONS))
+)
+
+COUNT_PLANES: int = 5 # enough for 16 attackers of a square
+
+
+def get_piece_attacks(value: int, square: int, occupied: int) -> int:
+	"Squares attacked by an encoded piece standing on the square"
+
+	match value & Board.TYPE_MASK:
+		case Piece.TYPE_PAWN:
+			return PAWN_ATTACKS[value >> 3][square]
+		case Piece.TYPE_KNIGHT:
+			return KNIGHT_ATTACKS[square]
+		case Piece.TYPE_KING:
+			return KING_ATTACKS[square]
+		case Piece.TYPE_ROOK:
+			return get_slider_attacks(square, PERPENDICULAR_DIRECTIONS, occupied)
+		case Piece.TYPE_BISHOP:
+			return get_slider_attacks(square, DIAGONAL_DIRECTIONS, occupied)
+		case Piece.TYPE_QUEEN:
+			return get_slider_attacks(square, PERPENDICULAR_DIRECTIONS + DIAGONAL_DIRECTIONS, occupied)
+
+	return 0
+
+
+class AttackMaps:
+	"""Number of pieces of each side attacking every square. The counts are bit sliced -
+	bit i of a square's count is the square's bit in planes[is_white][i]"""
+
+	__slots__ = ('planes',)
+
+	def __init__(self) -> None:
+		self.planes: list[list[int]] = [[0] * COUNT_PLANES, [0] * COUNT_PLANES] # [black, white]
+
+	def copy(self) -> 'AttackMaps':
+		maps = AttackMaps.__new__(AttackMaps)
+		maps.planes = [self.planes[0].copy(), self.planes[1].copy()]
+		return maps
+
+	def add(self, is_white: bool, bits: int) -> None:
+		"Adds 1 to the count of every square in bits"
+
+		planes = self.planes[is_white]
+
+		for i in range(COUNT_PLANES):
+			if not bits:
+				break
+			plane = planes[i]
+			planes[i] = plane ^ bits
+			bits &= plane # carry
+
+	def remove(self, is_white: bool, bits: int) -> None:
+		"Subtracts 1 from the count of every square in bits"
+
+		planes = self.planes[is_white]
+
+		for i in range(COUNT_PLANES):
+			if not bits:
+				break
+			plane = planes[i]
+			planes[i] = plane ^ bits
+			bits &= ~plane # borrow
+
+	def is_attacked(self, square: int, by_white: bool) -> bool:
+		for plane in self.planes[by_white]:
+			if plane >> square & 1:
+				return True
+		return False
+
+	def get_count(self, square: int, by_white: bool) -> int:
+		return sum((plane >> square & 1) << i for i, plane in enumerate(self.planes[by_white]))
+
+	def update(self, board: Board, square: int, previous: int, value: int) -> None:
+		"Called by Board.set_square before the square changes from previous to value"
+
+		if previous == value:
+			return
+
+		occupied = board.occupancy[0] | board.occupancy[1]
+
+		# 1. the piece on the square
+		if previous:
+			self.remove(previous >> 3 == 1, get_piece_attacks(previous, square, occupied))
+		if value:
+			self.add(value >> 3 == 1, get_piece_attacks(value, square, occupied))
+
+		# 2. rays of sliders, that pass through the square, only change if it's emptied or filled
+		if previous and value:
+			return
+
+		bitboards = board.bitboards
+		queens = bitboards[Piece.TYPE_QUEEN] | bitboards[Piece.TYPE_QUEEN | Board.COLOR_WHITE]
+		perpendicular = bitboards[Piece.TYPE_ROOK] | bitboards[Piece.TYPE_ROOK | Board.COLOR_WHITE] | queens
+		diagonal = bitboards[Piece.TYPE_BISHOP] | bitboards[Piece.TYPE_BISHOP | Board.COLOR_WHITE] | queens
+
+		# a slider on the square's ray attacks the square, if it's the nearest piece on the ray
+		for direction, rays, opposite_rays, is_positive in SLIDER_UPDATE_RAYS:
+			sliders = perpendicular if direction < 4 else diagonal
+			blockers = rays[square] & occupied
+
+			if not blockers & sliders:
+				continue
+
+			slider = (blockers & -blockers).bit_length() - 1 if is_positive else blockers.bit_length() - 1
+
+			if not sliders >> slider & 1:
+				continue
+
+			# it continues behind the square up to the next blocker
+			behind = opposite_rays[square]
+			blockers = behind & occupied
+			if blockers:
+				behind ^= opposite_rays[get_first_blocker(blockers, OPPOSITE_DIRECTIONS[direction])]
+
+			if value:
+				self.remove(board.squares[slider] >> 3 == 1, behind)
+			else:
+				self.add(board.squares[slider] >> 3 == 1, behind)
+
+
+def compute_attack_maps(board: Board) -> AttackMaps:
+
+	maps = AttackMaps()
+	occupied = board.occupancy[0] | board.occupancy[1]
+
+	for square, value in enumerate(board.squares):
+		if value:
+			maps.add(value >> 3 == 1, get_piece_attacks(value, square, occupied))
+
+	return maps
+
+
+def get_attack_maps(board: Board) -> AttackMaps:
+	"Creates the board's attack maps on first use, set_square keeps them up to date afterwards"
+
+	if board.attack_maps is None:
+		board.attack_maps = compute_attack_maps(board)
+
+	return board.attack_maps
+
+
+def to_positions(bits: int) -> list[Position]:
+	"Ordered by x, then by y, like Board.get_all_pieces_positions"
+
+	ret = []
+
+	while bits:
+		lowest = bits & -bits
+		ret.append(Board.from_square(lowest.bit_length() - 1))
+		bits ^= lowest
+
+	ret.sort()
+
+	return ret
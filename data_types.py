@@ -1,4 +1,9 @@
-from typing import Optional, Generic, TypeVar
+from typing import Optional, Generic, TypeVar, TYPE_CHECKING
+from abc import ABC, abstractmethod
+import random
+
+if TYPE_CHECKING:
+	from bitboard import AttackMaps
 
 
 class Piece:
@@ -50,7 +55,9 @@ Piece.CHAR_TO_TYPE = {
 
 T = TypeVar('T', Piece, int)
 
-class SquareGrid(Generic[T]):
+class SquareGrid(ABC, Generic[T]):
+
+	__slots__ = () # subclasses decide how their squares are stored
 	
 	# WARNING: (0, 0) is in the top-left corner,
 	# but the y axis is numbered in reverse, when the grid is printed
@@ -74,8 +81,17 @@ class SquareGrid(Generic[T]):
 		"(0, 0) -> 'a8'"
 		return cls.FILE_SYMBOLS[x] + cls.RANK_SYMBOLS[y]
 
-	def __init__(self) -> None:
-		self.fields: list[list[T]] = []
+	@classmethod
+	def to_square(cls, x: int, y: int) -> int:
+		"Index in a flat, row by row storage. ex. (0, 0) -> 0 (a8), (7, 7) -> 63 (h1)"
+		return y * cls.SIZE + x
+
+	@classmethod
+	def from_square(cls, square: int) -> tuple[int, int]:
+		"ex. 63 -> (7, 7)"
+		return (square % cls.SIZE, square // cls.SIZE)
+
+	fields: 'list[list[T]] | GridView'
 	
 	def __str__(self) -> str:
 		s = '\n  '
@@ -94,6 +110,61 @@ class SquareGrid(Generic[T]):
 	def str_field(self, field) -> str:
 		return str(field)
 
+	# used by GridView
+	@abstractmethod
+	def get_field(self, x: int, y: int) -> T:
+		...
+
+	@abstractmethod
+	def set_field(self, x: int, y: int, value: T) -> None:
+		...
+
+
+class GridColumnView:
+	"One column (fixed x) of a GridView"
+
+	__slots__ = ('grid', 'x')
+
+	def __init__(self, grid: SquareGrid, x: int) -> None:
+		self.grid = grid
+		self.x = x
+
+	def __getitem__(self, y: int):
+		return self.grid.get_field(self.x, y)
+
+	def __setitem__(self, y: int, value) -> None:
+		self.grid.set_field(self.x, y, value)
+
+	def __len__(self) -> int:
+		return self.grid.SIZE
+
+	def __iter__(self):
+		return (self.grid.get_field(self.x, y) for y in range(self.grid.SIZE))
+
+	def __eq__(self, other) -> bool:
+		return list(self) == list(other)
+
+
+class GridView:
+	"Makes a grid with flat storage accessible as grid.fields[x][y], like a list of lists"
+
+	__slots__ = ('grid',)
+
+	def __init__(self, grid: SquareGrid) -> None:
+		self.grid = grid
+
+	def __getitem__(self, x: int) -> GridColumnView:
+		return GridColumnView(self.grid, x)
+
+	def __len__(self) -> int:
+		return self.grid.SIZE
+
+	def __iter__(self):
+		return (GridColumnView(self.grid, x) for x in range(self.grid.SIZE))
+
+	def __eq__(self, other) -> bool:
+		return [list(column) for column in self] == [list(column) for column in other]
+
 
 
 
@@ -108,61 +179,380 @@ DEFAULT_BOARD_DATA = [
 	"RNBQKBNR",
 ]
 
+INITIAL_FEN: str = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
 Position = tuple[int, int]
 
+class SquareView:
+	"Piece-like view of a board's square, changing its type or color changes the board"
+
+	__slots__ = ('board', 'x', 'y')
+
+	def __init__(self, board: 'Board', x: int, y: int) -> None:
+		self.board = board
+		self.x = x
+		self.y = y
+
+	@property
+	def type(self) -> int:
+		return self.board.get_piece_type(self.x, self.y)
+
+	@type.setter
+	def type(self, type: int) -> None:
+		self.board.set_piece(self.x, self.y, type, self.is_white)
+
+	@property
+	def is_white(self) -> bool:
+		return self.board.is_piece_white(self.x, self.y)
+
+	@is_white.setter
+	def is_white(self, is_white: bool) -> None:
+		self.board.set_piece(self.x, self.y, self.type, is_white)
+
+	def __repr__(self) -> str:
+		return repr(self.board.get_piece(self.x, self.y))
+
+	def __copy__(self) -> Piece:
+		return self.board.get_piece(self.x, self.y)
+
+
 class Board(SquareGrid[Piece]):
+
+	# every square is stored as a single byte - piece type in the lower bits and COLOR_WHITE
+	# empty squares are always 0, so they don't have a color
+	COLOR_WHITE: int = 8
+	TYPE_MASK: int = 7
+
+	CASTLING_WHITE_KINGSIDE: int = 1
+	CASTLING_WHITE_QUEENSIDE: int = 2
+	CASTLING_BLACK_KINGSIDE: int = 4
+	CASTLING_BLACK_QUEENSIDE: int = 8
+
+	# random 64 bit numbers, the zobrist key is a xor of the ones describing the position
+	ZOBRIST_PIECES: list[list[int]] = [] # initialised below, [encoded piece][square]
+	ZOBRIST_CASTLING: list[int] = [] # initialised below, [castling rights]
+	ZOBRIST_EN_PASSANT: list[int] = [] # initialised below, [x]
+	ZOBRIST_BLACK_TO_MOVE: int = 0 # initialised below
 	
 	def __init__(self, board_data: list[str] = DEFAULT_BOARD_DATA) -> None:
 		assert len(board_data) == self.SIZE
 
-		super().__init__()
+		self.squares: bytearray = bytearray(self.SIZE * self.SIZE)
+
+		# bit (y * SIZE + x) is set, when the piece is on (x, y)
+		self.bitboards: list[int] = [0] * (self.COLOR_WHITE << 1) # indexed by encoded pieces
+		self.occupancy: list[int] = [0, 0] # [black, white]
+
+		self.moved_pieces: list[Position] = [] # [(x, y), ...]
+		self.en_passant_position: Optional[Position] = None
+		self.undo_stack: list[tuple] = [] # used by move.make_move and move.unmake_move
+
+		# updated by set_square and move.execute_a_move, assumes white's turn
+		self.zobrist_key: int = 0
+		# per side counts of attacking pieces, created by bitboard.get_attack_maps and then updated by set_square
+		self.attack_maps: Optional['AttackMaps'] = None
 		
 		for y in range(self.SIZE):
 			assert len(board_data[y]) == self.SIZE
-			
-			self.fields.append([])
 		
 			for x in range(self.SIZE):
-				char = board_data[x][y]
+				char = board_data[y][x]
 				assert char.lower() in Piece.CHAR_TO_TYPE.keys()
 				
 				is_white = char.isupper()
 				type = Piece.CHAR_TO_TYPE[char.lower()]
 
-				self.fields[y].append(Piece(type, is_white))
+				self.set_piece(x, y, type, is_white)
 
-		self.moved_pieces: list[Position] = [] # [(x, y), ...]
-		self.en_passant_position: Optional[Position] = None
+		self.zobrist_key ^= self.get_zobrist_state_key()
+
+	@classmethod
+	def encode_piece(cls, type: int, is_white: bool) -> int:
+		if type == Piece.TYPE_NONE:
+			return 0
+		return type | cls.COLOR_WHITE if is_white else type
+
+	@property
+	def fields(self) -> GridView:
+		"Compatibility view, board.fields[x][y] behaves like a Piece"
+		return GridView(self)
+
+	def get_field(self, x: int, y: int) -> SquareView:
+		return SquareView(self, x, y)
+
+	def set_field(self, x: int, y: int, piece: Piece) -> None:
+		self.set_piece(x, y, piece.type, piece.is_white)
+
+	def copy(self) -> 'Board':
+		board = Board.__new__(Board)
+		board.squares = self.squares[:]
+		board.bitboards = self.bitboards.copy()
+		board.occupancy = self.occupancy.copy()
+		board.moved_pieces = self.moved_pieces.copy()
+		board.en_passant_position = self.en_passant_position
+		board.undo_stack = self.undo_stack.copy()
+		board.zobrist_key = self.zobrist_key
+		board.attack_maps = None if self.attack_maps is None else self.attack_maps.copy()
+		return board
+
+	def get_square(self, x: int, y: int) -> int:
+		"Returns the encoded piece"
+		return self.squares[y * self.SIZE + x]
+
+	def set_square(self, x: int, y: int, value: int) -> None:
+		"Sets the encoded piece, every change to the board goes through here"
+		square = y * self.SIZE + x
+		bit = 1 << square
+
+		previous = self.squares[square]
+
+		if self.attack_maps is not None:
+			# needs the board before the change
+			self.attack_maps.update(self, square, previous, value)
+
+		if previous:
+			self.zobrist_key ^= self.ZOBRIST_PIECES[previous][square]
+			self.bitboards[previous] ^= bit
+			self.occupancy[previous >> 3] ^= bit # the color bit is the highest one
+
+		if value:
+			self.zobrist_key ^= self.ZOBRIST_PIECES[value][square]
+			self.bitboards[value] |= bit
+			self.occupancy[value >> 3] |= bit
+
+		self.squares[square] = value
+
+	def get_piece_type(self, x: int, y: int) -> int:
+		return self.squares[y * self.SIZE + x] & self.TYPE_MASK
+
+	def is_piece_white(self, x: int, y: int) -> bool:
+		return self.squares[y * self.SIZE + x] & self.COLOR_WHITE != 0
+
+	def get_piece(self, x: int, y: int) -> Piece:
+		"Returns a copy of the piece, changing it doesn't change the board"
+		return Piece(self.get_piece_type(x, y), self.is_piece_white(x, y))
+
+	def set_piece(self, x: int, y: int, type: int, is_white: bool) -> None:
+		self.set_square(x, y, self.encode_piece(type, is_white))
+
+	def remove_piece(self, x: int, y: int) -> None:
+		self.set_square(x, y, 0)
 	
 	def is_position_valid(self, x: int, y: int) -> bool:
 		return x >= 0 and y >= 0 and x < self.SIZE and y < self.SIZE
 
 	def is_position_empty(self, x: int, y: int) -> bool:
-		return self.fields[x][y].type == Piece.TYPE_NONE
+		return self.squares[y * self.SIZE + x] == 0
 	
 	def is_position_enemy(self, x: int, y: int, of_white: bool) -> bool:
-		"WARNING: Tile's is_white property isn't updated, when a piece moves out of it, only check non empty tiles"
-		return self.fields[x][y].is_white != of_white
+		"WARNING: empty tiles are never white, only check non empty tiles"
+		return self.is_piece_white(x, y) != of_white
 
 	def was_piece_moved(self, x: int, y: int) -> bool:
 		return (x, y) in self.moved_pieces
 
 	def get_all_pieces_positions(self) -> list[Position]:
-		ret: list[Position] = []
-		
-		for x, row in enumerate(self.fields):
-			for y, field in enumerate(row):
-				if field.type != Piece.TYPE_NONE:
-					ret.append((x, y))
-		return ret
+		"Ordered by x, then by y"
+		return bitboard.to_positions(self.occupancy[0] | self.occupancy[1])
 	
 	def get_pieces_positions(self, type: int, is_white: bool) -> tuple[Position, ...]:
-		
-		def f(data: Position) -> bool:
-			x, y = data
-			return self.fields[x][y].type == type and self.fields[x][y].is_white == is_white
+		"Ordered by x, then by y"
+		return tuple(bitboard.to_positions(self.bitboards[self.encode_piece(type, is_white)]))
+
+	def get_king_position(self, is_white: bool) -> Position:
+		bits = self.bitboards[self.encode_piece(Piece.TYPE_KING, is_white)]
+		assert bits, "There is no king on the board"
+
+		return self.from_square((bits & -bits).bit_length() - 1)
+
+	def get_castling_rights(self) -> int:
+		"Derived from moved_pieces, see CASTLING_* for the bits"
+
+		rights = 0
+
+		for is_white, y, kingside, queenside in (
+			(True, self.SIZE - 1, self.CASTLING_WHITE_KINGSIDE, self.CASTLING_WHITE_QUEENSIDE),
+			(False, 0, self.CASTLING_BLACK_KINGSIDE, self.CASTLING_BLACK_QUEENSIDE),
+		):
+			if self.get_square(4, y) != self.encode_piece(Piece.TYPE_KING, is_white) or self.was_piece_moved(4, y):
+				continue
+
+			rook = self.encode_piece(Piece.TYPE_ROOK, is_white)
+
+			if self.get_square(self.SIZE - 1, y) == rook and not self.was_piece_moved(self.SIZE - 1, y):
+				rights |= kingside
+			if self.get_square(0, y) == rook and not self.was_piece_moved(0, y):
+				rights |= queenside
+
+		return rights
+
+	def get_zobrist_state_key(self) -> int:
+		"Castling rights and en passant part of the zobrist key"
+
+		key = self.ZOBRIST_CASTLING[self.get_castling_rights()]
+
+		if self.is_en_passant_possible():
+			key ^= self.ZOBRIST_EN_PASSANT[self.en_passant_position[0]]
+
+		return key
+
+	def is_en_passant_possible(self) -> bool:
+		"""Whether a pawn stands next to the pawn, that has just moved two squares, so it could capture it.
+		Otherwise the en passant square doesn't change the position (like in Polyglot keys)"""
+
+		if self.en_passant_position is None:
+			return False
+
+		x, y = self.en_passant_position
+		# the square behind a white pawn is on the 3rd rank, its capturers are black
+		is_white = y == self.SIZE - 3
+		pawn_y = y - 1 if is_white else y + 1
+		capturer = self.encode_piece(Piece.TYPE_PAWN, not is_white)
+
+		return (x > 0 and self.squares[pawn_y * self.SIZE + x - 1] == capturer) \
+			or (x < self.SIZE - 1 and self.squares[pawn_y * self.SIZE + x + 1] == capturer)
+
+	def compute_zobrist_key(self, is_whites_turn: bool = True) -> int:
+		"Computes the key from scratch, zobrist_key should always be equal to it"
+
+		key = self.get_zobrist_state_key()
 
-		return tuple(filter(f, self.get_all_pieces_positions()))
+		for square, value in enumerate(self.squares):
+			if value:
+				key ^= self.ZOBRIST_PIECES[value][square]
+
+		if not is_whites_turn:
+			key ^= self.ZOBRIST_BLACK_TO_MOVE
+
+		return key
+
+	@classmethod
+	def from_fen(cls, fen: str) -> 'Board':
+		"""Castling rights and en passant are stored in moved_pieces and en_passant_position,
+		the zobrist key includes the side to move. Can throw exceptions"""
+
+		fields = fen.split()
+
+		if len(fields) not in (4, 6):
+			raise Exception(f"Invalid FEN \"{fen}\" (expected 4 or 6 fields)")
+
+		placement, side, castling, en_passant = fields[:4]
+
+		ranks = placement.split('/')
+
+		if len(ranks) != cls.SIZE:
+			raise Exception(f"Invalid FEN \"{fen}\" (expected {cls.SIZE} ranks)")
+
+		board_data = []
+
+		for rank in ranks:
+			row = ''
+			for char in rank:
+				if char.isdigit():
+					row += '_' * int(char)
+				elif char.lower() in Piece.get_valid_piece_chars():
+					row += char
+				else:
+					raise Exception(f"Invalid FEN \"{fen}\" (invalid piece symbol \"{char}\")")
+
+			if len(row) != cls.SIZE:
+				raise Exception(f"Invalid FEN \"{fen}\" (rank \"{rank}\" doesn't have {cls.SIZE} squares)")
+
+			board_data.append(row)
+
+		if side not in ('w', 'b'):
+			raise Exception(f"Invalid FEN \"{fen}\" (invalid side to move \"{side}\")")
+
+		board = cls(board_data)
+		is_whites_turn = side == 'w'
+
+		for is_white in (True, False):
+			if board.bitboards[cls.encode_piece(Piece.TYPE_KING, is_white)].bit_count() != 1:
+				raise Exception(f"Invalid FEN \"{fen}\" (every side needs exactly one king)")
+
+		if castling != '-' and (not castling or set(castling) - set('KQkq')):
+			raise Exception(f"Invalid FEN \"{fen}\" (invalid castling rights \"{castling}\")")
+
+		# a missing right means, that its rook was moved
+		for char, x, y in (('K', cls.SIZE - 1, cls.SIZE - 1), ('Q', 0, cls.SIZE - 1), ('k', cls.SIZE - 1, 0), ('q', 0, 0)):
+			if char not in castling and board.get_piece_type(x, y) == Piece.TYPE_ROOK:
+				board.moved_pieces.append((x, y))
+
+		if en_passant != '-':
+			x = cls.file_to_x(en_passant[:1])
+			y = cls.rank_to_y(en_passant[1:])
+
+			# the square behind a pawn, that has just moved two squares
+			pawn_y = y + 1 if is_whites_turn else y - 1
+
+			if len(en_passant) != 2 or x == -1 or y != (2 if is_whites_turn else cls.SIZE - 3) \
+			or board.get_square(x, pawn_y) != cls.encode_piece(Piece.TYPE_PAWN, not is_whites_turn):
+				raise Exception(f"Invalid FEN \"{fen}\" (invalid en passant square \"{en_passant}\")")
+
+			# move.en_passant_cleanup expects the pawn to be the last moved piece
+			board.moved_pieces.append((x, pawn_y))
+			board.en_passant_position = (x, y)
+
+		# the en passant square is only a part of the key, when a pawn can capture
+		board.zobrist_key = board.compute_zobrist_key(is_whites_turn)
+
+		return board
+
+	def to_fen(self, is_whites_turn: bool = True, halfmove_clock: int = 0, fullmove_number: int = 1) -> str:
+
+		ranks = []
+
+		for y in range(self.SIZE):
+			rank = ''
+			empty = 0
+
+			for x in range(self.SIZE):
+				if self.is_position_empty(x, y):
+					empty += 1
+					continue
+
+				if empty:
+					rank += str(empty)
+					empty = 0
+
+				rank += repr(self.get_piece(x, y))
+
+			if empty:
+				rank += str(empty)
+
+			ranks.append(rank)
+
+		rights = self.get_castling_rights()
+
+		castling = ''.join(char for char, bit in (
+			('K', self.CASTLING_WHITE_KINGSIDE),
+			('Q', self.CASTLING_WHITE_QUEENSIDE),
+			('k', self.CASTLING_BLACK_KINGSIDE),
+			('q', self.CASTLING_BLACK_QUEENSIDE),
+		) if rights & bit) or '-'
+
+		en_passant = '-' if self.en_passant_position is None else self.parse_position(*self.en_passant_position)
+
+		return f'{"/".join(ranks)} {"w" if is_whites_turn else "b"} {castling} {en_passant} {halfmove_clock} {fullmove_number}'
+
+
+def _init_zobrist() -> None:
+	# seeded, so keys stay the same between runs and can be stored in files
+	rng = random.Random(0x5EED)
+	
+	Board.ZOBRIST_PIECES = [[rng.getrandbits(64) for _ in range(Board.SIZE * Board.SIZE)] for _ in range(Board.COLOR_WHITE << 1)]
+	Board.ZOBRIST_EN_PASSANT = [rng.getrandbits(64) for _ in range(Board.SIZE)]
+	Board.ZOBRIST_BLACK_TO_MOVE = rng.getrandbits(64)
+
+	rights_keys = [rng.getrandbits(64) for _ in range(4)]
+	Board.ZOBRIST_CASTLING = [0] * 16
+
+	for rights in range(16):
+		for bit in range(4):
+			if rights >> bit & 1:
+				Board.ZOBRIST_CASTLING[rights] ^= rights_keys[bit]
+
+_init_zobrist()
 
 
 class Mask(SquareGrid[int]):
@@ -178,15 +568,56 @@ class Mask(SquareGrid[int]):
 
 	FLAG_TO_CHAR: dict = {} # initialised below
 
+	# bit (y * SIZE + x) of a bitset is set, when the field has its flag
+	__slots__ = ('move_bits', 'capture_bits', 'en_passant_bits')
+
 	def __init__(self) -> None:
-		super().__init__()
-		mask_data = [[self.FLAG_NONE] * self.SIZE] * self.SIZE
-		
-		for y in range(self.SIZE):
-			self.fields.append([])
-		
-			for x in range(self.SIZE):
-				self.fields[y].append(mask_data[x][y])
+		self.move_bits: int = 0
+		self.capture_bits: int = 0
+		self.en_passant_bits: int = 0
+
+	@property
+	def fields(self) -> GridView:
+		"Compatibility view, mask.fields[x][y] returns the field's flags"
+		return GridView(self)
+
+	def get_field(self, x: int, y: int) -> int:
+		return self.get_flags(x, y)
+
+	def set_field(self, x: int, y: int, flags: int) -> None:
+		self.set_flags(x, y, flags)
+
+	def get_flags(self, x: int, y: int) -> int:
+		"FLAG_NONE if no flag is set"
+
+		square = y * self.SIZE + x
+
+		flags = (
+			(self.move_bits >> square & 1) * self.FLAG_MOVE
+			| (self.capture_bits >> square & 1) * self.FLAG_CAPTURE
+			| (self.en_passant_bits >> square & 1) * self.FLAG_EN_PASSANT
+		)
+
+		return flags or self.FLAG_NONE
+
+	def set_flags(self, x: int, y: int, flags: int) -> None:
+		"Replaces the field's flags"
+
+		bit = 1 << (y * self.SIZE + x)
+
+		self.move_bits = (self.move_bits | bit) if flags & self.FLAG_MOVE else (self.move_bits & ~bit)
+		self.capture_bits = (self.capture_bits | bit) if flags & self.FLAG_CAPTURE else (self.capture_bits & ~bit)
+		self.en_passant_bits = (self.en_passant_bits | bit) if flags & self.FLAG_EN_PASSANT else (self.en_passant_bits & ~bit)
+
+	def get_target_bits(self) -> int:
+		"Fields with any flag set"
+		return self.move_bits | self.capture_bits | self.en_passant_bits
+
+	def clear(self) -> None:
+		"Lets a mask be reused without allocating a new one"
+		self.move_bits = 0
+		self.capture_bits = 0
+		self.en_passant_bits = 0
 
 	def str_field(self, field) -> str:
 		return Mask.FLAG_TO_CHAR[field]
@@ -224,4 +655,20 @@ class Meta: # just an enum
 	TAG_PAWN_PROMOTION: MetaTag = 3
 	TAG_CHECK: MetaTag = 4
 	TAG_CHECKMATE: MetaTag = 5
-	
\ No newline at end of file
+	
+
+
+TokenType = int
+
+class Token: # just an enum
+	TYPE_MOVE: TokenType = 0
+	TYPE_MOVE_NUMBER: TokenType = 1
+	TYPE_NAG: TokenType = 2
+	TYPE_COMMENT: TokenType = 3
+	TYPE_VARIATION: TokenType = 4
+	TYPE_RESULT: TokenType = 5
+	TYPE_TAG: TokenType = 6
+
+
+# bitboard imports Board, so it's imported after everything it needs is defined
+import bitboard
@@ -1,39 +1,144 @@
 
 import os
+import re
+import json
+import multiprocessing
+import mmap
+import struct
 import move
 import input_parser
-from data_types import Board
+from move import MoveSteps
+from array import array
+from data_types import Piece, Board, Token, TokenType
+
+from typing import Iterator, Optional, Callable, TypeVar
+
+HISTORY_SNAPSHOT_INTERVAL: int = 16 # plies between board snapshots kept by Game
+
+# (board, is_whites_turn, halfmove_clock, fullmove_number) before the move with the same index in Game.moves
+GameSnapshot = tuple[Board, bool, int, int]
+
 
 class Game:
-	def __init__(self) -> None:
+	def __init__(self, snapshot_interval: int = HISTORY_SNAPSHOT_INTERVAL) -> None:
+		assert snapshot_interval > 0, "The snapshot interval has to be positive"
+
 		self.is_whites_turn: bool = True
 		self.move_sequence: list[str] = []
 		self.board: Board = Board()
+		# only needed for FEN
+		self.halfmove_clock: int = 0 # plies since the last capture or pawn move
+		self.fullmove_number: int = 1
 
+		# history for position_at - every played move and a snapshot every snapshot_interval plies,
+		# the first one is taken before the first move, so Game.from_fen can replace the board
+		self.moves: array[move.EncodedMove] = array('H')
+		self.snapshots: list[GameSnapshot] = []
+		self.snapshot_interval: int = snapshot_interval
 
-def make_turn(game: Game, move_input: str) -> None | Exception:
+	@classmethod
+	def from_fen(cls, fen: str, snapshot_interval: int = HISTORY_SNAPSHOT_INTERVAL) -> 'Game':
+		"Can throw exceptions"
 
-	move_steps = input_parser.parse_and_complete(game.board, game.is_whites_turn, move_input)
-	if isinstance(move_steps, Exception): return move_steps
+		game = cls(snapshot_interval)
+		game.board = Board.from_fen(fen)
 
-	move.execute_a_move(game.board, move_steps)
+		fields = fen.split()
+		game.is_whites_turn = fields[1] == 'w'
 
-	game.move_sequence.append(move_input)
+		if len(fields) == 6:
+			try:
+				game.halfmove_clock = int(fields[4])
+				game.fullmove_number = int(fields[5])
+			except ValueError:
+				raise Exception(f"Invalid FEN \"{fen}\" (invalid move counters)")
+
+		return game
+
+	def to_fen(self) -> str:
+		return self.board.to_fen(self.is_whites_turn, self.halfmove_clock, self.fullmove_number)
+
+	def get_ply_count(self) -> int:
+		return len(self.moves)
+
+	def position_at(self, ply: int) -> 'Game':
+		"""The game after the given number of plies (0 is the starting position), replayed from the nearest snapshot.
+		Can throw exceptions"""
+
+		if not 0 <= ply <= len(self.moves):
+			raise Exception(f'Ply {ply} is out of range (0-{len(self.moves)})')
+
+		game = Game(self.snapshot_interval)
+
+		if ply == len(self.moves):
+			snapshot = (self.board, self.is_whites_turn, self.halfmove_clock, self.fullmove_number)
+			game.snapshots = self.snapshots.copy()
+			start = ply
+		else:
+			index = ply // self.snapshot_interval
+			snapshot = self.snapshots[index]
+			game.snapshots = self.snapshots[:index + 1]
+			start = index * self.snapshot_interval
+
+		board, game.is_whites_turn, game.halfmove_clock, game.fullmove_number = snapshot
+		# the snapshots are shared, so they are never changed
+		game.board = board.copy()
+		game.moves = self.moves[:start]
+
+		for encoded in self.moves[start:ply]:
+			execute_turn(game, move.decode_move(game.board, encoded))
+
+		game.move_sequence = self.move_sequence[:ply]
+
+		return game
+
+
+def execute_turn(game: Game, move_steps: MoveSteps) -> None:
+	"Plays an already validated move and records it in the game's history, move_sequence isn't changed"
+
+	if len(game.moves) == len(game.snapshots) * game.snapshot_interval:
+		game.snapshots.append((game.board.copy(), game.is_whites_turn, game.halfmove_clock, game.fullmove_number))
+
+	x, y, x2, y2 = move_steps[0]
+
+	if game.board.get_piece_type(x, y) == Piece.TYPE_PAWN or not game.board.is_position_empty(x2, y2):
+		game.halfmove_clock = 0
+	else:
+		game.halfmove_clock += 1
+
+	if not game.is_whites_turn:
+		game.fullmove_number += 1
+
+	game.moves.append(move.encode_move(game.board, move_steps))
+
+	move.execute_a_move(game.board, move_steps)
 
 	game.is_whites_turn = not game.is_whites_turn
 
 
-def game_from_moves(moves: list[str], *, debug=False) -> Game | Exception:
+def make_turn(game: Game, move_input: str, *, trust_annotations=False) -> None | Exception:
+
+	move_steps = input_parser.parse_and_complete(game.board, game.is_whites_turn, move_input, trust_annotations=trust_annotations)
+	if isinstance(move_steps, Exception): return move_steps
+
+	execute_turn(game, move_steps)
+
+	game.move_sequence.append(move_input)
+
+
+def game_from_moves(moves: list[str], *, debug=False, verbose=True, trust_annotations=False) -> Game | Exception:
+	"trust_annotations skips verifying captures, checks and checkmates of the moves, for games from trusted sources"
 
 	game = Game()
 
 	for move in moves:
 
-		turn = make_turn(game, move)
+		turn = make_turn(game, move, trust_annotations=trust_annotations)
 
 		if isinstance(turn, Exception):
 			
-			print(f'ERROR: Invalid move "{move}" ({turn})')
+			if verbose:
+				print(f'ERROR: Invalid move "{move}" ({turn})')
 			
 			if debug:
 				print(f'Board: {game.board}')
@@ -69,7 +174,10 @@ def run_user_input_game() -> None:
 	print('Exited')
 
 
-def read_pgn_file_data(path: str, game_index=0) -> str:
+PGN_INDEX_EXTENSION: str = '.idx'
+
+
+def validate_pgn_path(path: str) -> None:
 	"Can throw exceptions"
 
 	if not os.path.exists(path):
@@ -81,79 +189,355 @@ def read_pgn_file_data(path: str, game_index=0) -> str:
 	if not path.endswith('.pgn'):
 		raise Exception(f"ERROR: File \"{path}\" is not in the .pgn format")
 
-	with open(path, 'r') as file:
 
-		i = 0
-		data = ''
-		started_reading_moves = False
+def find_game_offsets(data: bytes | mmap.mmap) -> list[int]:
+	"Returns the byte offset of every game. A game ends, when a tag line follows its moves"
+
+	if not data:
+		return []
+
+	offsets = [0]
+	start = 0
+
+	while True:
+		# moves start at the first line beginning with '1'
+		if data[start:start+1] == b'1':
+			moves = start
+		else:
+			moves = data.find(b'\n1', start)
+			if moves == -1:
+				break
+
+		end = data.find(b'\n[', moves)
+		if end == -1:
+			break
+
+		start = end + 1
+		offsets.append(start)
+
+	return offsets
+
+
+def build_pgn_index(path: str) -> list[int]:
+	"Returns the byte offset of every game in the file"
+
+	with open(path, 'rb') as file:
+
+		if os.fstat(file.fileno()).st_size == 0:
+			return []
+
+		with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			return find_game_offsets(data)
+
+
+SidecarData = TypeVar('SidecarData')
+
+def load_sidecar(
+	path: str,
+	extension: str,
+	build: Callable[[str], SidecarData],
+	load: Callable[[str, os.stat_result], Optional[SidecarData]],
+	save: Callable[[str, os.stat_result, SidecarData], None],
+) -> SidecarData:
+	"""Data derived from the file and cached next to it (path + extension). load gets the file's stat
+	and returns None if the cache is stale, then the data is built again and saved. Can throw exceptions"""
+
+	stat = os.stat(path)
+	sidecar_path = path + extension
+
+	try:
+		data = load(sidecar_path, stat)
+		if data is not None:
+			return data
+	except (OSError, ValueError, KeyError, TypeError, EOFError, struct.error):
+		pass
+
+	data = build(path)
+
+	try:
+		save(sidecar_path, stat, data)
+	except OSError:
+		# the sidecar is only a cache, a read-only directory shouldn't prevent reading the file
+		pass
+
+	return data
+
+
+def is_sidecar_fresh(mtime: int, size: int, stat: os.stat_result) -> bool:
+	"Whether a sidecar, that was saved with the mtime and size of its source file, still describes it"
+	return mtime == stat.st_mtime_ns and size == stat.st_size
+
+
+def read_json_sidecar(sidecar_path: str, stat: os.stat_result) -> Optional[dict]:
+	"Can throw exceptions"
+
+	with open(sidecar_path, 'r') as file:
+		data = json.load(file)
+
+	return data if is_sidecar_fresh(data['mtime'], data['size'], stat) else None
+
+
+def write_json_sidecar(sidecar_path: str, stat: os.stat_result, data: dict) -> None:
+	with open(sidecar_path, 'w') as file:
+		json.dump({'mtime': stat.st_mtime_ns, 'size': stat.st_size, **data}, file)
+
+
+def load_pgn_index(path: str) -> list[int]:
+	"Returns game offsets from the sidecar index file, rebuilds the index if it's missing or stale"
+
+	def load(index_path: str, stat: os.stat_result) -> Optional[list[int]]:
+		index = read_json_sidecar(index_path, stat)
+		return None if index is None else index['offsets']
+
+	def save(index_path: str, stat: os.stat_result, offsets: list[int]) -> None:
+		write_json_sidecar(index_path, stat, {'offsets': offsets})
+
+	return load_sidecar(path, PGN_INDEX_EXTENSION, build_pgn_index, load, save)
 
 
+def read_pgn_file_data(path: str, game_index=0) -> str:
+	"Can throw exceptions"
+
+	validate_pgn_path(path)
+
+	offsets = load_pgn_index(path)
+
+	if not offsets:
+		raise Exception(f"ERROR: File \"{path}\" is empty")
+
+	if game_index >= len(offsets):
+		raise Exception(f"ERROR: File \"{path}\" contains only {len(offsets)} games")
+
+	with open(path, 'rb') as file:
+
+		file.seek(offsets[game_index])
+
+		if game_index + 1 < len(offsets):
+			data = file.read(offsets[game_index + 1] - offsets[game_index])
+		else:
+			data = file.read()
+
+	return data.decode('utf-8-sig').replace('\r\n', '\n')
+
+
+class PgnFile:
+	"""Memory mapped .pgn file. Games are found with byte searches (or the sidecar index)
+	and only the ones, that are asked for, are decoded. Can throw exceptions"""
+
+	def __init__(self, path: str) -> None:
+		validate_pgn_path(path)
+
+		self.path: str = path
+		self.offsets: list[int] = load_pgn_index(path)
+
+		self.file = open(path, 'rb')
+		self.data: bytes | mmap.mmap = b''
+
+		if os.fstat(self.file.fileno()).st_size > 0:
+			self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def __len__(self) -> int:
+		return len(self.offsets)
+
+	def __enter__(self) -> 'PgnFile':
+		return self
+
+	def __exit__(self, *_) -> None:
+		self.close()
+
+	def close(self) -> None:
+		if isinstance(self.data, mmap.mmap):
+			self.data.close()
+		self.file.close()
+
+	def get_game_bytes(self, game_index: int) -> memoryview:
+		"A view into the mapped file, no data is copied. WARNING: release the view before closing the file"
+
+		start = self.offsets[game_index]
+		end = self.offsets[game_index + 1] if game_index + 1 < len(self.offsets) else len(self.data)
+
+		return memoryview(self.data)[start:end]
+
+	def get_game_data(self, game_index: int) -> str:
+		"Decoded game, the same as read_pgn_file_data would return"
+
+		with self.get_game_bytes(game_index) as view:
+			return str(view, 'utf-8-sig').replace('\r\n', '\n')
+
+	def __iter__(self) -> Iterator[str]:
+		return (self.get_game_data(i) for i in range(len(self)))
+
+
+PGN_TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+
+
+def parse_pgn_tag(line: str) -> Optional[tuple[str, str]]:
+	"ex. '[White \"Adams, Michael\"]' -> ('White', 'Adams, Michael')"
+
+	match = PGN_TAG_PATTERN.match(line)
+
+	if match is None:
+		return None
+
+	name, value = match.groups()
+
+	return (name, value.replace('\\"', '"').replace('\\\\', '\\'))
+
+
+PgnGame = tuple[dict[str, str], str] # (tags, movetext)
+
+def iter_pgn_file_games(path: str) -> Iterator[PgnGame]:
+	"Yields tags and movetext of every game, reading the file once. Can throw exceptions"
+
+	validate_pgn_path(path)
+
+	with open(path, 'r', encoding='utf-8-sig') as file:
+
+		tags: dict[str, str] = {}
+		movetext: list[str] = []
+		started_reading_moves = False
+
 		for line in file:
 			if line[0] == '[' and started_reading_moves:
-				i += 1
+				yield (tags, ''.join(movetext))
+				tags = {}
+				movetext = []
 				started_reading_moves = False
 			elif line[0] == '1':
 				started_reading_moves = True
-			if i == game_index:
-				data += line
-		
-		if game_index > i:
-			raise Exception(f"ERROR: File \"{path}\" contains only {i+1} games")
 
-		if not data:
-			raise Exception(f"ERROR: File \"{path}\" is empty")
+			tag = parse_pgn_tag(line) if line[0] == '[' else None
 
-		return data
+			if tag is not None:
+				name, value = tag
+				tags[name] = value
+			else:
+				movetext.append(line)
 
+		data = ''.join(movetext)
 
-def extract_moves(pgn_data: str) -> list[str] | Exception:
-	
-	mid = pgn_data.rfind(']') + 1
-	pgn_data = pgn_data[mid:]
+		if tags or data.strip():
+			yield (tags, data)
+
+
+PGN_TOKEN_PATTERN = re.compile(r'''
+	\{(?P<brace_comment>[^}]*)\}?
+	| ;(?P<line_comment>[^\n]*)
+	| (?P<tag>\[(?:[^\]"] | "(?:[^"\\] | \\.)*"?)*\]?)
+	| (?P<nag>\$\d+ | [!?]+)
+	| (?P<variation_start>\()
+	| (?P<variation_end>\))
+	| (?P<result>(?:1-0 | 0-1 | 1/2-1/2 | \*)(?![^\s{};()\[\]$]))
+	| (?P<move_number>\d+(?=[.\s]|$)\.*)
+	| (?P<move>[^\s{};()\[\]$.!?]+(?:\s*\(?e\.p\.\)?)?)
+	| (?P<other>\S)
+''', re.VERBOSE)
+
+PgnToken = tuple[TokenType, str]
 
-	# removing comments
-	while pgn_data.count(';') > 0:
-		i = pgn_data.find(';')
-		j = pgn_data.find('\n', i)
-		pgn_data = pgn_data[:i] + pgn_data[j:]
+def tokenize_movetext(pgn_data: str) -> Iterator[PgnToken]:
+	"Yields tokens of the movetext in a single pass. Variations are yielded whole, without their parentheses"
 
-	while pgn_data.count('{') > 0:
-		i = pgn_data.find('{')
-		j = pgn_data.find('}', i) + 1
-		pgn_data = pgn_data[:i] + ' '  + pgn_data[j:]
+	variation_depth = 0
+	variation_start = 0
 
-	# getting rid of the elipsis, that happenes when a comment cuts a turn in half
-	# eg. 1. a3 a5 -> 1. a3 {comment} 1... a5
-	while pgn_data.count("...") > 0:
-		j = pgn_data.find("...") + 3
-		i = pgn_data.rfind(' ', 0, j)
-		pgn_data = pgn_data[:i] + ' ' + pgn_data[j:]
+	for match in PGN_TOKEN_PATTERN.finditer(pgn_data):
 
+		kind = match.lastgroup
 
-	pgn_data = pgn_data.replace('\n', ' ').replace('.', ' ').replace('  ', ' ').strip()
+		if kind == 'variation_start':
+			if variation_depth == 0:
+				variation_start = match.end()
+			variation_depth += 1
 
-	moves = []
+		elif kind == 'variation_end':
+			if variation_depth == 1:
+				yield (Token.TYPE_VARIATION, pgn_data[variation_start:match.start()])
+			variation_depth = max(variation_depth - 1, 0)
 
-	for i, m in enumerate(pgn_data.split()):
-		if i % 3 == 0:
+		elif variation_depth > 0 or kind == 'other':
+			# moves inside of variations aren't a part of the game
+			# stray symbols (eg. '.' between a move number and a move) are ignored
 			continue
-		moves.append(m)
-	
-	if len(moves) <= 1:
-		return Exception("No valid moves found in file")
 
-	# TODO
-	# getting rid of games result (eg. "1-0")
-	moves.pop()
+		elif kind == 'move':
+			yield (Token.TYPE_MOVE, match.group())
+
+		elif kind == 'move_number':
+			yield (Token.TYPE_MOVE_NUMBER, match.group().rstrip('.'))
+
+		elif kind == 'result':
+			yield (Token.TYPE_RESULT, match.group())
+
+		elif kind == 'nag':
+			yield (Token.TYPE_NAG, match.group())
+
+		elif kind == 'brace_comment' or kind == 'line_comment':
+			yield (Token.TYPE_COMMENT, match.group(kind))
+
+		elif kind == 'tag':
+			yield (Token.TYPE_TAG, match.group())
+
+
+def extract_moves(pgn_data: str) -> list[str] | Exception:
+
+	moves = [text for type, text in tokenize_movetext(pgn_data) if type == Token.TYPE_MOVE]
+
+	if not moves:
+		return Exception("No valid moves found in file")
 
 	return moves
 
 
-def game_from_pgn_data(data: str, *, debug=False) -> Game | Exception:
+def game_from_pgn_data(data: str, *, debug=False, verbose=True, trust_annotations=False) -> Game | Exception:
 
 	moves = extract_moves(data)
 
 	if isinstance(moves, Exception):
 		return moves
 	else:
-		return game_from_moves(moves, debug=debug)
+		return game_from_moves(moves, debug=debug, verbose=verbose, trust_annotations=trust_annotations)
+
+
+def validate_pgn_data(data: str) -> Optional[str]:
+	"Returns None if the game is valid, otherwise its error message"
+
+	try:
+		g = game_from_pgn_data(data, verbose=False)
+	except Exception as e:
+		# a crash in the engine shouldn't stop validation of the remaining games
+		return f'{type(e).__name__}: {e}'
+
+	return str(g) if isinstance(g, Exception) else None
+
+
+ValidationResult = tuple[int, int, dict[str, int]] # (valid games, invalid games, {error message: count})
+
+def validate_pgn_file(path: str, jobs: Optional[int] = None) -> ValidationResult:
+	"Replays every game of the file on a pool of jobs processes (all cores by default). Can throw exceptions"
+
+	validate_pgn_path(path)
+
+	movetexts = (movetext for _, movetext in iter_pgn_file_games(path))
+
+	valid = 0
+	invalid = 0
+	errors: dict[str, int] = {}
+
+	def count(error: Optional[str]) -> None:
+		nonlocal valid, invalid
+		if error is None:
+			valid += 1
+		else:
+			invalid += 1
+			errors[error] = errors.get(error, 0) + 1
+
+	if jobs == 1:
+		for movetext in movetexts:
+			count(validate_pgn_data(movetext))
+	else:
+		with multiprocessing.Pool(jobs) as pool:
+			for error in pool.imap_unordered(validate_pgn_data, movetexts, chunksize=16):
+				count(error)
+
+	return (valid, invalid, errors)
@@ -0,0 +1,188 @@
+# Compact binary copy of the valid games of a PGN database. Moves are stored as move.encode_move values,
+# so games are reloaded by executing them, without tokenizing the movetext and resolving SAN
+#
+# File layout (little endian):
+#	magic, version, game count (I)
+#	byte offset of every game and of the end of the last one (Q)
+#	every game: tag count (H), [length (H), utf-8 name, length (H), utf-8 value] for every tag, move count (H), moves (H)
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+
+import game
+import move
+
+from typing import Iterator
+
+
+GAME_DATABASE_EXTENSION: str = '.cgdb'
+MAGIC: bytes = b'CHGD'
+VERSION: int = 1
+
+HEADER_FORMAT: str = '<HI' # version, game count
+
+GameRecord = tuple[dict[str, str], array] # (tags, encoded moves)
+
+
+def encode_game(tags: dict[str, str], moves: array) -> bytes:
+
+	data = bytearray(struct.pack('<H', len(tags)))
+
+	for name, value in tags.items():
+		for text in (name, value):
+			encoded = text.encode()
+			data += struct.pack('<H', len(encoded))
+			data += encoded
+
+	moves = array('H', moves)
+	if sys.byteorder == 'big':
+		moves.byteswap()
+
+	data += struct.pack('<H', len(moves))
+	data += moves.tobytes()
+
+	return bytes(data)
+
+
+def decode_game(data: bytes | memoryview) -> GameRecord:
+	"Can throw exceptions"
+
+	count, = struct.unpack_from('<H', data, 0)
+	position = 2
+
+	texts = []
+
+	for _ in range(count * 2):
+		length, = struct.unpack_from('<H', data, position)
+		position += 2
+		texts.append(str(data[position:position + length], 'utf-8'))
+		position += length
+
+	tags = dict(zip(texts[::2], texts[1::2]))
+
+	count, = struct.unpack_from('<H', data, position)
+	position += 2
+
+	moves = array('H')
+	moves.frombytes(data[position:position + count * 2])
+	if sys.byteorder == 'big':
+		moves.byteswap()
+
+	return (tags, moves)
+
+
+def game_from_record(moves: array) -> game.Game:
+	"Executes already validated moves, move_sequence stays empty because SAN isn't stored"
+
+	g = game.Game()
+
+	for encoded in moves:
+		game.execute_turn(g, move.decode_move(g.board, encoded))
+
+	return g
+
+
+class GameDatabase:
+	"Memory mapped game database, games are decoded when they are asked for. Can throw exceptions"
+
+	def __init__(self, path: str) -> None:
+		if not os.path.isfile(path):
+			raise Exception(f"ERROR: File \"{path}\" does not exist")
+
+		self.path: str = path
+		self.file = open(path, 'rb')
+
+		try:
+			self.data: bytes | mmap.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+			header_size = len(MAGIC) + struct.calcsize(HEADER_FORMAT)
+
+			if self.data[:len(MAGIC)] != MAGIC:
+				raise Exception(f"ERROR: File \"{path}\" is not a game database")
+
+			version, count = struct.unpack_from(HEADER_FORMAT, self.data, len(MAGIC))
+
+			if version != VERSION:
+				raise Exception(f"ERROR: Game database \"{path}\" has an unsupported version ({version})")
+
+			self.offsets: array = array('Q')
+			self.offsets.frombytes(self.data[header_size:header_size + (count + 1) * 8])
+			if sys.byteorder == 'big':
+				self.offsets.byteswap()
+
+			if len(self.offsets) != count + 1 or self.offsets[-1] > len(self.data):
+				raise Exception(f"ERROR: Game database \"{path}\" is truncated")
+		except (ValueError, struct.error):
+			# mmap can't map an empty file
+			self.close()
+			raise Exception(f"ERROR: File \"{path}\" is not a game database")
+		except Exception:
+			self.close()
+			raise
+
+	def __len__(self) -> int:
+		return len(self.offsets) - 1
+
+	def __enter__(self) -> 'GameDatabase':
+		return self
+
+	def __exit__(self, *_) -> None:
+		self.close()
+
+	def close(self) -> None:
+		if isinstance(getattr(self, 'data', None), mmap.mmap):
+			self.data.close()
+		self.file.close()
+
+	def get_record(self, game_index: int) -> GameRecord:
+
+		with memoryview(self.data)[self.offsets[game_index]:self.offsets[game_index + 1]] as view:
+			return decode_game(view)
+
+	def get_game(self, game_index: int) -> game.Game:
+		return game_from_record(self.get_record(game_index)[1])
+
+	def __iter__(self) -> Iterator[GameRecord]:
+		return (self.get_record(i) for i in range(len(self)))
+
+
+def export_pgn_file(pgn_path: str, path: str) -> tuple[int, int]:
+	"""Replays every game of the .pgn file and stores the valid ones.
+	Returns the numbers of stored and skipped games. Can throw exceptions"""
+
+	records: list[bytes] = []
+	skipped = 0
+
+	for tags, movetext in game.iter_pgn_file_games(pgn_path):
+
+		try:
+			g = game.game_from_pgn_data(movetext, verbose=False)
+		except Exception:
+			# a crash in the engine shouldn't stop the export of the remaining games
+			g = Exception()
+
+		if isinstance(g, Exception):
+			skipped += 1
+			continue
+
+		records.append(encode_game(tags, g.moves))
+
+	offsets = array('Q', [len(MAGIC) + struct.calcsize(HEADER_FORMAT) + (len(records) + 1) * 8])
+	for record in records:
+		offsets.append(offsets[-1] + len(record))
+
+	if sys.byteorder == 'big':
+		offsets.byteswap()
+
+	with open(path, 'wb') as file:
+		file.write(MAGIC)
+		file.write(struct.pack(HEADER_FORMAT, VERSION, len(records)))
+		offsets.tofile(file)
+
+		for record in records:
+			file.write(record)
+
+	return (len(records), skipped)
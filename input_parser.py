@@ -4,6 +4,7 @@ import move
 from move import MoveSteps
 
 from typing import Optional
+from collections import OrderedDict
 
 
 def separate_from_meta(user_input: str, *, ignore_hyphens=False) -> tuple[str, list[MetaTag]]:
@@ -53,16 +54,16 @@ def verify_meta(board: Board, is_white: bool, completed_input: MoveSteps, meta:
 	# WARNING: it only checks one piece's movement (the rook if it's castling)
 	x, y, x2, y2 = completed_input[-1]
 
-	destination_piece_type = board.fields[x2][y2].type
+	destination_piece_type = board.get_piece_type(x2, y2)
 
 	if Meta.TAG_CAPTURE in meta and destination_piece_type == Piece.TYPE_NONE:
-		if not move.create_piece_mask(board, x, y).fields[x2][y2] & Mask.FLAG_EN_PASSANT:
+		if not move.create_piece_mask(board, x, y).get_flags(x2, y2) & Mask.FLAG_EN_PASSANT:
 			return Exception("Not a capture")
 	
 	# if Meta.TAG_MOVE in meta and destination_piece_type != Piece.TYPE_NONE:
 	# 	return Exception("Not a move ()")
 
-	if Meta.TAG_EN_PASSANT in meta and not move.create_piece_mask(board, x, y, False).fields[x2][y2] & Mask.FLAG_EN_PASSANT:
+	if Meta.TAG_EN_PASSANT in meta and not move.create_piece_mask(board, x, y, False).get_flags(x2, y2) & Mask.FLAG_EN_PASSANT:
 		return Exception("Not an en passant")
 
 	if Meta.TAG_PAWN_PROMOTION in meta:
@@ -151,6 +152,9 @@ def complete_simple_move(board: Board, is_white: bool, parsed_input: ParsedInput
 	if y is not None:
 		positions = filter(lambda position: position[1] == y, positions)
 	
+	mask = Mask()
+	target_bit = 1 << board.to_square(x2, y2)
+
 	def is_move_valid(data: Position) -> bool:
 		"Checks if move x, y -> x2, y2 is valid"
 
@@ -158,60 +162,51 @@ def complete_simple_move(board: Board, is_white: bool, parsed_input: ParsedInput
 
 		xx, yy = data
 
-		mask = move.create_piece_mask(board, xx, yy)
+		move.create_piece_mask(board, xx, yy, mask=mask)
 
-		return mask.fields[x2][y2] != Mask.FLAG_NONE
+		return bool(mask.get_target_bits() & target_bit)
 
 	positions = tuple(filter(is_move_valid, positions))
 
-	possibilities = len(positions)
-	
-	if possibilities == 0:
+	if not positions:
 		return Exception('Move is not possible')
+
+	# pinned pieces can't perform the move, so they don't make it ambiguous
+	legal_positions = tuple(filter(lambda position: move.is_move_legal(board, is_white, position[0], position[1], x2, y2), positions))
+
+	possibilities = len(legal_positions)
+
+	if possibilities == 0:
+		return Exception("Move is not possible due to a check")
 	elif possibilities > 1:
 		return Exception(f'Move is ambiguous ({possibilities} pieces can perform it)')
 	else:
 
-		x, y = positions[0]
-
-		completed_input = [(x, y, x2, y2), ]
+		x, y = legal_positions[0]
 
-		if move.would_result_in(board, not is_white, completed_input, Meta.TAG_CHECK):
-			return Exception("Move is not possible due to a check")
-		
-		if board.fields[x2][y2].type == Piece.TYPE_KING:
+		if board.get_piece_type(x2, y2) == Piece.TYPE_KING:
 			# it should not be possible to get this error message
 			return Exception("The king cannot be captured")
 
-		return completed_input
+		return [(x, y, x2, y2), ]
 
 
 def complete_castling(board: Board, is_white: bool, is_kingside: bool) -> MoveSteps | Exception:
 
 	attack_color = not is_white
 
-	king_x, king_y = board.get_pieces_positions(Piece.TYPE_KING, is_white)[0]
+	king_x, king_y = board.get_king_position(is_white)
 
 	# 0. check if king was moved
-	if board.was_piece_moved(king_x, king_y):
+	if board.was_piece_moved(king_x, king_y) or (king_x, king_y) != (4, board.SIZE - 1 if is_white else 0):
 		return Exception(f'Castling impossible - king ({board.parse_position(king_x, king_y)}) was moved')
 
 	dist = 3 if is_kingside else -4
 
-	def f(data: Position) -> bool:
-		x, y = data
-		return board.fields[x][y].type == Piece.TYPE_ROOK \
-		and board.fields[x][y].is_white == is_white and (x - king_x) == dist \
+	rook_x, rook_y = king_x + dist, king_y
 
-	rooks = tuple(filter(f, board.get_all_pieces_positions()))
-	
-	if len(rooks) == 0:
+	if board.get_square(rook_x, rook_y) != board.encode_piece(Piece.TYPE_ROOK, is_white):
 		return Exception("Castling impossible - no rook found")
-	elif len(rooks) == 2:
-		# one rook was moved and both are the equal distance away from the king
-		rooks = tuple(filter(lambda data: board.was_piece_moved(data[0], data[1]), rooks))
-	
-	rook_x, rook_y = rooks[0]
 
 	direction = int((rook_x - king_x) / abs(rook_x - king_x)) # sign
 
@@ -223,12 +218,12 @@ def complete_castling(board: Board, is_white: bool, is_kingside: bool) -> MoveSt
 		return Exception(f'Castling impossible - king ({board.parse_position(king_x, king_y)}) is under attack')
 	
 	# 3. checking if the squares between the king and the rook are:
-	for i in range(1, 3):
+	for i in range(1, abs(dist)):
 		# a. empty
 		if not board.is_position_empty(king_x+direction*i, king_y):
 			return Exception(f'Castling impossible - field {board.parse_position(king_x+direction*i, king_y)} is not empty')
-		# b. not attacked
-		elif move.is_position_attacked(board, king_x+direction*i, king_y, attack_color):
+		# b. not attacked (only the ones the king passes through)
+		elif i <= 2 and move.is_position_attacked(board, king_x+direction*i, king_y, attack_color):
 			return Exception(f'Castling impossible - field {board.parse_position(king_x+direction*i, king_y)} under attack')
 
 	return [
@@ -237,7 +232,74 @@ def complete_castling(board: Board, is_white: bool, is_kingside: bool) -> MoveSt
 	]
 
 
-def parse_and_complete(board: Board, is_white: bool, user_input: str) -> MoveSteps | Exception:
+MoveCacheKey = tuple[int, bool, str, bool] # (zobrist key, is_white, user_input, trust_annotations)
+
+class MoveCache:
+	"Least recently used cache of parse_and_complete results, including errors"
+
+	def __init__(self, max_size: int = 100_000) -> None:
+		self.max_size: int = max_size # 0 disables the cache
+		self.entries: OrderedDict[MoveCacheKey, MoveSteps | Exception] = OrderedDict()
+		self.hits: int = 0
+		self.misses: int = 0
+
+	def get(self, key: MoveCacheKey) -> Optional[MoveSteps | Exception]:
+		result = self.entries.get(key)
+
+		if result is None:
+			self.misses += 1
+			return None
+
+		self.hits += 1
+		self.entries.move_to_end(key)
+
+		return result
+
+	def put(self, key: MoveCacheKey, result: MoveSteps | Exception) -> None:
+		if self.max_size <= 0:
+			return
+
+		self.entries[key] = result
+		self.entries.move_to_end(key)
+
+		while len(self.entries) > self.max_size:
+			self.entries.popitem(last=False)
+
+	def clear(self) -> None:
+		self.entries.clear()
+		self.hits = 0
+		self.misses = 0
+
+MOVE_CACHE = MoveCache()
+
+
+def parse_and_complete(board: Board, is_white: bool, user_input: str, *, trust_annotations=False) -> MoveSteps | Exception:
+	"""Cached complete_move, the zobrist key describes everything completing a move depends on.
+	With trust_annotations the meta (captures, checks, checkmates, ...) isn't verified"""
+
+	key = (board.zobrist_key, is_white, user_input, trust_annotations)
+
+	result = MOVE_CACHE.get(key)
+
+	if result is None:
+		if trust_annotations:
+			resolved = resolve_move(board, is_white, user_input)
+			result = resolved if isinstance(resolved, Exception) else resolved[0]
+		else:
+			result = complete_move(board, is_white, user_input)
+		MOVE_CACHE.put(key, result)
+
+	if isinstance(result, Exception):
+		return result
+
+	# the cached list could be changed by the caller otherwise
+	return list(result)
+
+
+ResolvedMove = tuple[MoveSteps, list[MetaTag]] # (completed input, meta)
+
+def resolve_move(board: Board, is_white: bool, user_input: str) -> ResolvedMove | Exception:
+	"Finds the move's steps without verifying its meta (captures, checks, ...)"
 	
 	if user_input[:3] in ('0-0', 'O-O'):
 
@@ -254,10 +316,7 @@ def parse_and_complete(board: Board, is_white: bool, user_input: str) -> MoveSte
 		completed_input = complete_castling(board, is_white, is_kingside)
 		if isinstance(completed_input, Exception): return completed_input
 
-		v = verify_meta(board, is_white, completed_input, meta)
-		if isinstance(v, Exception): return v
-
-		return completed_input
+		return (completed_input, meta)
 	
 	else:
 		result = separate_from_meta(user_input)
@@ -271,7 +330,17 @@ def parse_and_complete(board: Board, is_white: bool, user_input: str) -> MoveSte
 		completed_input = complete_simple_move(board, is_white, parsed_input)
 		if isinstance(completed_input, Exception): return completed_input
 
-		v = verify_meta(board, is_white, completed_input, meta)
-		if isinstance(v, Exception): return v
+		return (completed_input, meta)
+
+
+def complete_move(board: Board, is_white: bool, user_input: str) -> MoveSteps | Exception:
+
+	resolved = resolve_move(board, is_white, user_input)
+	if isinstance(resolved, Exception): return resolved
+
+	completed_input, meta = resolved
+
+	v = verify_meta(board, is_white, completed_input, meta)
+	if isinstance(v, Exception): return v
 
-		return completed_input
\ No newline at end of file
+	return completed_input
@@ -1,13 +1,28 @@
+import bench
 import game
+import game_database
+import movegen
+import opening_tree
+import profiling
+import tag_index
 import sys
+import time
 
 
 def print_usage(sys_argv: list[str]) -> None:
 	print(f"Usage:")
 	print(f'\t{sys_argv[0]} <file> \t\t (Read the first game from a .pgn file)')
-	print(f'\t{sys_argv[0]} <file> <index> \t (Read game from a .pgn file. Indexes start at 1)')
+	print(f'\t{sys_argv[0]} <file> <index> \t (Read game from a .pgn file or a game database. Indexes start at 1)')
 	print(f'\t{sys_argv[0]} --play \t\t (Simulate game from keyboard inputs)')
+	print(f'\t{sys_argv[0]} --validate <file> [--jobs N] \t (Replay every game of a .pgn file on N processes and report errors)')
+	print(f'\t{sys_argv[0]} --perft <depth> \t (Count move tree nodes of the standard test positions)')
+	print(f'\t{sys_argv[0]} --tree <file> [moves...] \t (List moves played in a .pgn file after the given moves)')
+	print(f'\t{sys_argv[0]} --tree <file> --fen "<fen>" \t (List moves played in a .pgn file from the position)')
+	print(f'\t{sys_argv[0]} --filter <tag><operator><value> [--filter ...] <file> \t (List games with matching tags, ex. --filter White=Adams --filter ECO=C0*)')
+	print(f'\t{sys_argv[0]} --export <file> [output] \t (Store the valid games of a .pgn file in a compact binary database, <file>{game_database.GAME_DATABASE_EXTENSION} by default)')
+	print(f'\t{sys_argv[0]} --bench [file] [--games N] [--output F] [--baseline F] [--threshold X] \t (Measure replay speed, Adams.pgn by default. Exits with 1 if it\'s slower than the baseline results)')
 	# print(f'\t{sys_argv[0]} --length <file> \t (Prints the number of games in a .pgn file)')
+	print(f'\t{sys_argv[0]} <command> --profile \t (Print calls and time of the interpreter\'s functions at exit, also enabled by {profiling.PROFILE_ENVIRONMENT_VARIABLE}=1)')
 	print(f'\t{sys_argv[0]} --help \t\t (Print this message)')
 
 
@@ -27,6 +42,10 @@ def read_game(sys_argv: list[str]) -> None:
 		# print_usage(sys_argv)
 		exit(1)
 	
+	if path.endswith(game_database.GAME_DATABASE_EXTENSION):
+		read_database_game(path, i)
+		return
+
 	data: list[str]
 
 	try:
@@ -45,9 +64,254 @@ def read_game(sys_argv: list[str]) -> None:
 		print(g.board)
 
 
+def read_database_game(path: str, i: int) -> None:
+
+	try:
+		with game_database.GameDatabase(path) as database:
+			if i >= len(database):
+				raise Exception(f"ERROR: File \"{path}\" contains only {len(database)} games")
+
+			g = database.get_game(i)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	print(g.board)
+
+
+def export_games(sys_argv: list[str]) -> None:
+
+	path = sys_argv[2]
+	output = sys_argv[3] if len(sys_argv) == 4 else path + game_database.GAME_DATABASE_EXTENSION
+
+	start = time.perf_counter()
+
+	try:
+		stored, skipped = game_database.export_pgn_file(path, output)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	elapsed = time.perf_counter() - start
+
+	print(f'Stored {stored} games in "{output}", skipped {skipped} invalid games ({elapsed:.2f}s)')
+
+
+def validate_games(sys_argv: list[str]) -> None:
+
+	path = sys_argv[2]
+	jobs = None
+
+	if len(sys_argv) == 5:
+		try:
+			if sys_argv[3] not in ("-j", "--jobs"):
+				raise Exception()
+			jobs = int(sys_argv[4])
+			if jobs < 1:
+				raise Exception()
+		except:
+			print("ERROR: Expected --jobs followed by a positive intiger")
+			exit(1)
+
+	start = time.perf_counter()
+
+	try:
+		valid, invalid, errors = game.validate_pgn_file(path, jobs)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	elapsed = time.perf_counter() - start
+	total = valid + invalid
+
+	print(f'Valid games: {valid}')
+	print(f'Invalid games: {invalid}')
+
+	if errors:
+		print('Errors:')
+		for error, count in sorted(errors.items(), key=lambda item: item[1], reverse=True):
+			print(f'\t{count}\t{error}')
+
+	print(f'Replayed {total} games in {elapsed:.2f}s ({total / elapsed:.1f} games/s)')
+
+	if invalid:
+		exit(1)
+
+
+def run_perft(sys_argv: list[str]) -> None:
+
+	try:
+		depth = int(sys_argv[2])
+		if depth < 1:
+			raise Exception()
+	except:
+		print("ERROR: The depth needs to be a positive intiger")
+		exit(1)
+
+	failed = False
+
+	for name, depth, nodes, expected, elapsed in movegen.run_perft_suite(depth):
+		status = 'OK' if nodes == expected else f'MISMATCH (expected {expected})'
+		failed = failed or nodes != expected
+		print(f'{name:<12} depth {depth}: {nodes:>10} nodes {elapsed:8.2f}s {nodes / max(elapsed, 1e-9):>10.0f} nodes/s  {status}')
+
+	if failed:
+		exit(1)
+
+
+def query_opening_tree(sys_argv: list[str]) -> None:
+
+	path = sys_argv[2]
+	moves = sys_argv[3:]
+
+	try:
+		tree = opening_tree.load_opening_tree(path)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	if moves[:1] == ['--fen']:
+		if len(moves) != 2:
+			print("ERROR: Expected --fen followed by a quoted FEN")
+			exit(1)
+
+		entries = tree.lookup_fen(moves[1])
+		position = moves[1]
+	else:
+		entries = tree.lookup_moves(moves)
+		position = " ".join(moves) or "the starting position"
+
+	if isinstance(entries, Exception):
+		print(f'ERROR: Invalid position ({entries})')
+		exit(1)
+
+	print(f'{sum(len(games) for _, games, _ in entries)} games continue from {position}')
+
+	for move, games, results in entries:
+		wins, draws, losses = results.count('1-0'), results.count('1/2-1/2'), results.count('0-1')
+		print(f'\t{move:<8} {len(games):>6} games \t+{wins} ={draws} -{losses}')
+
+
+def filter_games(sys_argv: list[str]) -> None:
+
+	*args, path = sys_argv[1:]
+
+	filters = []
+
+	for i in range(0, len(args), 2):
+		if args[i] != "--filter" or i + 1 >= len(args):
+			print("ERROR: Expected --filter followed by a filter")
+			print_usage(sys_argv)
+			exit(1)
+
+		f = tag_index.parse_filter(args[i + 1])
+
+		if isinstance(f, Exception):
+			print(f'ERROR: {f}')
+			exit(1)
+
+		filters.append(f)
+
+	try:
+		table = tag_index.load_tag_table(path)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	indexes = table.filter(filters)
+
+	for i in indexes:
+		tags = table.get_tags(i)
+		# WARNING: 1 is added to make it more human intuitive, like in read_game
+		print(f'{i + 1}\t{tags.get("White", "?")} - {tags.get("Black", "?")}\t{tags.get("Result", "*")}\t{tags.get("Date", "")}\t{tags.get("ECO", "")}')
+
+	print(f'{len(indexes)} of {len(table)} games match')
+
+
+def run_bench(sys_argv: list[str]) -> None:
+
+	args = sys_argv[2:]
+
+	path = bench.BENCH_FILE
+	max_games = None
+	output = None
+	baseline = None
+	threshold = bench.BENCH_THRESHOLD
+
+	if args and not args[0].startswith('--'):
+		path = args.pop(0)
+
+	if len(args) % 2:
+		print("ERROR: Every option needs a value")
+		print_usage(sys_argv)
+		exit(1)
+
+	for option, value in zip(args[::2], args[1::2]):
+		try:
+			match option:
+				case "--games":
+					max_games = int(value)
+					if max_games < 1:
+						raise Exception()
+				case "--output":
+					output = value
+				case "--baseline":
+					baseline = bench.load_result(value)
+				case "--threshold":
+					threshold = float(value)
+					if threshold < 0:
+						raise Exception()
+				case _:
+					print(f'ERROR: Unknown option "{option}"')
+					print_usage(sys_argv)
+					exit(1)
+		except OSError as e:
+			print(f'ERROR: Couldn\'t read the baseline ({e})')
+			exit(1)
+		except Exception:
+			print(f'ERROR: Invalid value "{value}" of {option}')
+			exit(1)
+
+	try:
+		result = bench.run_benchmark(path, max_games)
+	except Exception as e:
+		print(e)
+		exit(1)
+
+	bench.print_result(result)
+
+	if output is not None:
+		bench.save_result(result, output)
+
+	if baseline is not None:
+		regressions = bench.compare_results(result, baseline, threshold)
+
+		for regression in regressions:
+			print(f'REGRESSION: {regression}')
+
+		if regressions:
+			exit(1)
+
+
 def main(sys_argv: list[str]) -> None:
 
+	if profiling.is_requested(sys_argv):
+		sys_argv = [arg for arg in sys_argv if arg != '--profile']
+		profiling.enable()
+
 	match len(sys_argv):
+		case n if n >= 2 and sys_argv[1] == "--bench":
+			run_bench(sys_argv)
+
+		case 3 | 4 if sys_argv[1] == "--export":
+			export_games(sys_argv)
+
+		case n if n >= 3 and sys_argv[1] == "--tree":
+			query_opening_tree(sys_argv)
+
+		case n if n >= 4 and sys_argv[1] == "--filter":
+			filter_games(sys_argv)
+
 		case 2:
 			match sys_argv[1]:
 				case "-p" | "--play":
@@ -61,8 +325,15 @@ def main(sys_argv: list[str]) -> None:
 			match sys_argv[1]:
 				# case "-l" | "--length":
 				# 	pass
+				case "-v" | "--validate":
+					validate_games(sys_argv)
+				case "--perft":
+					run_perft(sys_argv)
 				case _:
 					read_game(sys_argv)
+
+		case 5 if sys_argv[1] in ("-v", "--validate"):
+			validate_games(sys_argv)
 			
 		case n:
 			if n == 1:
@@ -76,15 +347,3 @@ def main(sys_argv: list[str]) -> None:
 if __name__ == '__main__':
 	
 	main(sys.argv)
-
-	# errors = {}
-	
-	# for i in range(3000):
-	# 	g = game.game_from_pgn_data(game.read_pgn_file_data('tests/data/Adams.pgn', i), debug=True)
-	# 	if isinstance(g, Exception):
-	# 		errors[str(g)] = errors.get(str(g), 0) + 1
-
-	# print(errors)
-
-
-
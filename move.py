@@ -1,50 +1,33 @@
 from data_types import Piece, Board, Mask, Position, Meta, MetaTag
-from copy import copy
+import bitboard
+
+from typing import Optional
+
+
+# attack queries use bitboards, the mask based implementation is kept as a reference
+USE_BITBOARDS: bool = True
 
 
 def test_line(board: Board, mask: Mask, x: int, y: int, dx: int, dy: int, length: int) -> None:
 	"Mutates the mask, flags its fields for capture, move and en passant in a line from (x, y) in the direction of (x+dx, y+dy)."
-	
-	assert x in range(0, board.SIZE)
-	assert y in range(0, board.SIZE)
-	assert dx in (-1, 0, 1)
-	assert dy in (-1, 0, 1)
-	assert length <= 7
-
-	is_white = board.fields[x][y].is_white
-
-	length_x: int
-	length_y: int
-
-	match dx:
-		case -1:
-			length_x = x
-		case 0:
-			length_x = length
-		case 1:
-			length_x = board.SIZE - 1 - x
-	
-	match dy:
-		case -1:
-			length_y = y
-		case 0:
-			length_y = length
-		case 1:
-			length_y = board.SIZE - 1 - y
-
-
-	for _ in range(min(length, length_x, length_y)):
-		x += dx
-		y += dy
-		
-		assert y in range(0, board.SIZE), "There is an error in this function"
-		assert x in range(0, board.SIZE), "There is an error in this function"
-		
-		if board.is_position_empty(x, y):
-			mask.fields[x][y] = Mask.FLAG_MOVE | Mask.FLAG_CAPTURE
+
+	square = y * board.SIZE + x
+	color = board.squares[square] >> 3
+	ray = bitboard.RAY_SQUARES[bitboard.DIRECTION_INDEX[(dx, dy)]][square]
+
+	if length < len(ray):
+		ray = ray[:length]
+
+	for square2 in ray:
+		value = board.squares[square2]
+		bit = 1 << square2
+
+		if value == 0:
+			mask.move_bits |= bit
+			mask.capture_bits |= bit
 		else:
-			if board.is_position_enemy(x, y, is_white):
-				mask.fields[x][y] = Mask.FLAG_CAPTURE
+			if value >> 3 != color:
+				mask.capture_bits |= bit
 			break
 
 
@@ -62,29 +45,29 @@ def test_perpendiculars(board: Board, mask: Mask, x: int, y: int, length: int) -
 	test_line(board, mask, x, y, 0, 1, length)
 
 
-def test_knight(board: Board, mask: Mask, x: int, y: int) -> None:
+def test_targets(board: Board, mask: Mask, x: int, y: int, targets: tuple[tuple[int, ...], ...]) -> None:
+	"Flags squares of a jumping piece, targets is bitboard.KNIGHT_TARGETS or bitboard.KING_TARGETS"
 
-	assert x in range(0, board.SIZE)
-	assert y in range(0, board.SIZE)
+	square = y * board.SIZE + x
+	color = board.squares[square] >> 3
 
-	is_white = board.fields[x][y].is_white
-	
-	# possible moves relative to knight's position
-	xy = (
-		(-2, -1), (-2, 1),
-		(-1, -2), (1, -2),
-		(2, -1), (2, 1),
-		(1, 2), (-1, 2),
-	)
+	for square2 in targets[square]:
+		value = board.squares[square2]
+		bit = 1 << square2
+
+		if value == 0:
+			mask.move_bits |= bit
+			mask.capture_bits |= bit
+		elif value >> 3 != color:
+			mask.capture_bits |= bit
+
+
+def test_knight(board: Board, mask: Mask, x: int, y: int) -> None:
+	test_targets(board, mask, x, y, bitboard.KNIGHT_TARGETS)
 
-	for p in xy:
-		x2 = p[0] + x
-		y2 = p[1] + y
-		if board.is_position_valid(x2, y2):
-			if board.is_position_empty(x2, y2):
-				mask.fields[x2][y2] = Mask.FLAG_MOVE | Mask.FLAG_CAPTURE
-			elif board.is_position_enemy(x2, y2, is_white):
-				mask.fields[x2][y2] = Mask.FLAG_CAPTURE
+
+def test_king(board: Board, mask: Mask, x: int, y: int) -> None:
+	test_targets(board, mask, x, y, bitboard.KING_TARGETS)
 
 
 def test_pawn(board: Board, mask: Mask, x: int, y: int) -> None:
@@ -94,14 +77,15 @@ def test_pawn(board: Board, mask: Mask, x: int, y: int) -> None:
 	assert x in range(0, board.SIZE)
 	assert y in range(0, board.SIZE)
 	
-	is_white = board.fields[x][y].is_white
+	is_white = board.is_piece_white(x, y)
 	
 	xy = ()
 
 	direction = -1 if is_white else 1
 
 	# possible moves relative to pawn's position
-	if board.was_piece_moved(x, y):
+	# only pawns, that haven't moved, are on their starting rank
+	if y != (board.SIZE - 2 if is_white else 1):
 		xy = ((0, direction),)
 	else:
 		xy = ((0, direction), (0, 2*direction))
@@ -111,7 +95,7 @@ def test_pawn(board: Board, mask: Mask, x: int, y: int) -> None:
 		y2 = p[1] + y
 		if board.is_position_valid(x2, y2):
 			if board.is_position_empty(x2, y2):
-				mask.fields[x2][y2] = Mask.FLAG_MOVE
+				mask.set_flags(x2, y2, Mask.FLAG_MOVE)
 			else:
 				break
 	
@@ -123,30 +107,33 @@ def test_pawn(board: Board, mask: Mask, x: int, y: int) -> None:
 		y2 = p[1] + y
 		if board.is_position_valid(x2, y2):
 			if board.is_position_empty(x2, y2) or board.is_position_enemy(x2, y2, is_white):
-				mask.fields[x2][y2] = Mask.FLAG_CAPTURE
+				mask.set_flags(x2, y2, Mask.FLAG_CAPTURE)
 	
 	if board.en_passant_position is not None:
 		px, py = board.en_passant_position
-		if mask.fields[px][py] == mask.FLAG_CAPTURE:
-			mask.fields[px][py] = mask.FLAG_EN_PASSANT | mask.FLAG_CAPTURE
+		if mask.get_flags(px, py) == Mask.FLAG_CAPTURE:
+			mask.set_flags(px, py, Mask.FLAG_EN_PASSANT | Mask.FLAG_CAPTURE)
 
 
 def test_pawn_cleanup(board: Board, mask: Mask, x: int, y: int) -> None:
 	
 	for x2, y2 in ((x-1, y-1), (x-1, y+1), (x+1, y-1), (x+1, y+1)):
-		if board.is_position_valid(x2, y2) and mask.fields[x2][y2] == Mask.FLAG_CAPTURE and board.is_position_empty(x2, y2):
-			mask.fields[x2][y2] = Mask.FLAG_NONE
+		if board.is_position_valid(x2, y2) and mask.get_flags(x2, y2) == Mask.FLAG_CAPTURE and board.is_position_empty(x2, y2):
+			mask.set_flags(x2, y2, Mask.FLAG_NONE)
 
 
-def create_piece_mask(board: Board, x: int, y: int, ignore_empty_tiles=True) -> Mask:
+def create_piece_mask(board: Board, x: int, y: int, ignore_empty_tiles=True, mask: Optional[Mask] = None) -> Mask:
+	"A passed mask is cleared and reused instead of allocating a new one"
 	
 	assert x in range(0, board.SIZE)
 	assert y in range(0, board.SIZE)
 	
-	field = board.fields[x][y]
-	mask = Mask()
+	if mask is None:
+		mask = Mask()
+	else:
+		mask.clear()
 
-	match field.type:
+	match board.get_piece_type(x, y):
 		case Piece.TYPE_PAWN:
 			test_pawn(board, mask, x, y)
 			if ignore_empty_tiles:
@@ -166,58 +153,87 @@ def create_piece_mask(board: Board, x: int, y: int, ignore_empty_tiles=True) ->
 			test_perpendiculars(board, mask, x, y, board.SIZE - 1)
 
 		case Piece.TYPE_KING:
-			test_diagonals(board, mask, x, y, 1)
-			test_perpendiculars(board, mask, x, y, 1)
+			test_king(board, mask, x, y)
 	
 	return mask
 
 
 def is_position_attacked(board: Board, x: int, y: int, by_white: bool) -> bool:
-	color_filter = lambda data: board.fields[data[0]][data[1]].is_white == by_white
+	if USE_BITBOARDS:
+		return bitboard.is_square_attacked(board, board.to_square(x, y), by_white)
+
+	return is_position_attacked_by_masks(board, x, y, by_white)
+
+
+def is_position_attacked_by_masks(board: Board, x: int, y: int, by_white: bool) -> bool:
+	color_filter = lambda data: board.is_piece_white(data[0], data[1]) == by_white
 	pieces = tuple(filter(color_filter, board.get_all_pieces_positions()))
 
+	mask = Mask()
+	square_bit = 1 << board.to_square(x, y)
+
 	for (x2, y2) in pieces:
-		mask = create_piece_mask(board, x2, y2, False)
-		if mask.fields[x][y] & Mask.FLAG_CAPTURE:
+		create_piece_mask(board, x2, y2, False, mask)
+		if mask.capture_bits & square_bit:
 			return True
 	
 	return False
 
 
 def get_attackers_positions(board: Board, x: int, y: int, are_white: bool) -> tuple[Position, ...]:
+	"Unlike is_position_attacked, pawns only attack empty squares, when capturing en passant"
+
+	if not USE_BITBOARDS:
+		return get_attackers_positions_by_masks(board, x, y, are_white)
+
+	square = board.to_square(x, y)
+
+	if board.occupancy[are_white] >> square & 1:
+		return ()
+
+	attackers = bitboard.get_attackers(board, square, are_white)
+
+	if board.is_position_empty(x, y) and (x, y) != board.en_passant_position:
+		attackers &= ~board.bitboards[board.encode_piece(Piece.TYPE_PAWN, are_white)]
+
+	return tuple(bitboard.to_positions(attackers))
+
+
+def get_attackers_positions_by_masks(board: Board, x: int, y: int, are_white: bool) -> tuple[Position, ...]:
+
+	mask = Mask()
+	square_bit = 1 << board.to_square(x, y)
 
 	def f(data: Position) -> bool:
 		x2, y2 = data
-		mask = create_piece_mask(board, x2, y2)
-		return mask.fields[x][y] & Mask.FLAG_CAPTURE and board.fields[x2][y2].is_white == are_white
+		create_piece_mask(board, x2, y2, mask=mask)
+		return bool(mask.capture_bits & square_bit) and board.is_piece_white(x2, y2) == are_white
 
 	return tuple(filter(f, board.get_all_pieces_positions()))
 
 
 def try_promoting_pawn(board: Board, x: int, y: int) -> None:
 
-	if board.fields[x][y].type == Piece.TYPE_PAWN \
-	and ( (board.fields[x][y].is_white and y == 0) 
-	or (not board.fields[x][y].is_white and y == board.SIZE-1) ):
-		board.fields[x][y].type = Piece.TYPE_QUEEN
+	if board.get_piece_type(x, y) == Piece.TYPE_PAWN \
+	and ( (board.is_piece_white(x, y) and y == 0) 
+	or (not board.is_piece_white(x, y) and y == board.SIZE-1) ):
+		board.set_piece(x, y, Piece.TYPE_QUEEN, board.is_piece_white(x, y))
 	
 
 
 def en_passant_cleanup(board: Board, x: int, y: int, x2: int, y2: int) -> None:
 	"Removes a pawn if it's captured en passant"
 
-	if (x2, y2) == board.en_passant_position and board.fields[x][y].type == Piece.TYPE_PAWN:
+	if (x2, y2) == board.en_passant_position and board.get_piece_type(x, y) == Piece.TYPE_PAWN:
 		x3, y3 = board.moved_pieces[-1]
-		board.fields[x3][y3].type = Piece.TYPE_NONE
+		board.remove_piece(x3, y3)
 	
 
 
 def move_a_piece(board: Board, x: int, y: int, x2: int, y2: int) -> None:
 
-	board.fields[x2][y2].type = board.fields[x][y].type
-	board.fields[x2][y2].is_white = board.fields[x][y].is_white
-	board.fields[x][y].type = Piece.TYPE_NONE
-	# WARNING: doesn't update is_white on the starting position
+	board.set_square(x2, y2, board.get_square(x, y))
+	board.remove_piece(x, y)
 
 	if board.was_piece_moved(x, y):
 		board.moved_pieces.remove((x, y))
@@ -225,7 +241,7 @@ def move_a_piece(board: Board, x: int, y: int, x2: int, y2: int) -> None:
 	board.moved_pieces.append((x2, y2))
 
 	# checking for possible en passant
-	if board.fields[x2][y2].type == Piece.TYPE_PAWN and abs(y-y2) == 2:
+	if board.get_piece_type(x2, y2) == Piece.TYPE_PAWN and abs(y-y2) == 2:
 		direction_y = int((y2-y) / abs(y2-y))
 		board.en_passant_position = (x, y+direction_y)
 	else:
@@ -235,132 +251,202 @@ def move_a_piece(board: Board, x: int, y: int, x2: int, y2: int) -> None:
 MoveSteps = list[tuple[int, int, int, int]]
 
 def execute_a_move(board: Board, move_steps: MoveSteps) -> None: 
+
+	# pieces are updated by Board.set_square, the rest of the key is swapped here
+	board.zobrist_key ^= board.get_zobrist_state_key()
 	
 	for x, y, x2, y2 in move_steps:
 		# WARNING_TO_MYSELF: effects of all of these 3 functions have to be concidered, when predicting moves effects
 		en_passant_cleanup(board, x, y, x2, y2)
 		move_a_piece(board, x, y, x2, y2)
 		try_promoting_pawn(board, x2, y2)
-	
 
-def would_result_in(board: Board, is_white: bool, move_steps: tuple, result: MetaTag) -> bool:
-	"is_white = is check/mate done by white. Returns true if performing move_steps would result in result (parameter) MetaTag"
+	board.zobrist_key ^= board.get_zobrist_state_key() ^ Board.ZOBRIST_BLACK_TO_MOVE
 	
-	assert result in (Meta.TAG_CHECK, Meta.TAG_CHECKMATE)
 
-	r = False
-	
+# bits 0-5 - from square, 6-11 - to square, 12-14 - piece type after a promotion (0 otherwise)
+EncodedMove = int
+
+def encode_move(board: Board, move_steps: MoveSteps) -> EncodedMove:
+	"Has to be called before the move is executed. Castling is stored as the king's step"
+
+	x, y, x2, y2 = move_steps[0]
+	encoded = board.to_square(x, y) | board.to_square(x2, y2) << 6
+
+	if board.get_piece_type(x, y) == Piece.TYPE_PAWN and y2 in (0, board.SIZE - 1):
+		# pawns are always promoted to queens by try_promoting_pawn
+		encoded |= Piece.TYPE_QUEEN << 12
+
+	return encoded
+
+
+def decode_move(board: Board, encoded: EncodedMove) -> MoveSteps:
+	"Inverse of encode_move in the same position, the move isn't validated"
+
+	x, y = board.from_square(encoded & 63)
+	x2, y2 = board.from_square(encoded >> 6 & 63)
+
+	move_steps = [(x, y, x2, y2)]
+
+	if board.get_piece_type(x, y) == Piece.TYPE_KING and abs(x2 - x) == 2:
+		# castling, the rook ends up next to the king, on the other side
+		rook_x = board.SIZE - 1 if x2 > x else 0
+		move_steps.append((rook_x, y, (x + x2) // 2, y))
+
+	return move_steps
+
+
+# ((x, y, piece, x2, y2, captured, captured_x, captured_y, moved_pieces index, en_passant_position), ...), zobrist_key
+# one tuple for every step of the move, pieces are encoded, the index is -1 if (x, y) wasn't in moved_pieces
+UndoRecord = tuple[tuple[tuple, ...], int]
+
+def make_move(board: Board, move_steps: MoveSteps) -> None:
+	"Executes the move like execute_a_move and pushes an UndoRecord on board.undo_stack"
+
+	undo = []
+	zobrist_key = board.zobrist_key
+
+	board.zobrist_key ^= board.get_zobrist_state_key()
+
 	for x, y, x2, y2 in move_steps:
-		
-		en_passant_cleanup(board, x, y, x2, y2)
-		
-		a: Piece = copy(board.fields[x][y])
-		b: Piece = copy(board.fields[x2][y2])
 
-		board.fields[x][y].type = Piece.TYPE_NONE
-		board.fields[x2][y2] = copy(a)
+		if (x2, y2) == board.en_passant_position and board.get_piece_type(x, y) == Piece.TYPE_PAWN:
+			captured_x, captured_y = board.moved_pieces[-1]
+		else:
+			captured_x, captured_y = x2, y2
+
+		undo.append((
+			x, y, board.get_square(x, y),
+			x2, y2, board.get_square(captured_x, captured_y),
+			captured_x, captured_y,
+			board.moved_pieces.index((x, y)) if board.was_piece_moved(x, y) else -1,
+			board.en_passant_position,
+		))
 
+		en_passant_cleanup(board, x, y, x2, y2)
+		move_a_piece(board, x, y, x2, y2)
 		try_promoting_pawn(board, x2, y2)
 
-		enemy_king_x, enemy_king_y = board.get_pieces_positions(Piece.TYPE_KING, not is_white)[0]
+	board.zobrist_key ^= board.get_zobrist_state_key() ^ Board.ZOBRIST_BLACK_TO_MOVE
 
-		is_check = is_position_attacked(board, enemy_king_x, enemy_king_y, is_white)
-		
-		if is_check:
-			if result == Meta.TAG_CHECKMATE:
-				r = is_checkmate(board, not is_white)
-			else:
-				r = result == Meta.TAG_CHECK
-			
-		# move cleanup
-		# and pawn promotion cleanup
-		board.fields[x][y] = a
-		board.fields[x2][y2] = b
+	board.undo_stack.append((tuple(undo), zobrist_key))
+
+
+def unmake_move(board: Board) -> None:
+	"Restores the board to its state before the last make_move"
+
+	steps, zobrist_key = board.undo_stack.pop()
 
-		# en passant cleanup cleanup
-		if board.en_passant_position is not None:
+	for x, y, piece, x2, y2, captured, captured_x, captured_y, index, en_passant_position in reversed(steps):
 
-			epx, epy = board.moved_pieces[-1]
+		board.moved_pieces.pop()
+		if index >= 0:
+			board.moved_pieces.insert(index, (x, y))
 
-			if board.fields[epx][epy].type == Piece.TYPE_NONE:
-				board.fields[epx][epy].type = Piece.TYPE_PAWN
+		board.remove_piece(x2, y2)
+		board.set_square(captured_x, captured_y, captured)
+		board.set_square(x, y, piece)
+
+		board.en_passant_position = en_passant_position
+
+	board.zobrist_key = zobrist_key
+	
+
+def is_move_legal(board: Board, is_white: bool, x: int, y: int, x2: int, y2: int) -> bool:
+	"Whether a pseudo legal move (not castling) leaves the own king out of check"
+
+	if not USE_BITBOARDS or ((x2, y2) == board.en_passant_position and board.get_piece_type(x, y) == Piece.TYPE_PAWN):
+		# en passant removes a piece from another square, it's simulated instead
+		return not would_result_in(board, not is_white, [(x, y, x2, y2)], Meta.TAG_CHECK)
+
+	info = bitboard.get_check_info(board, is_white)
+
+	return bitboard.is_legal_move(board, info, y * board.SIZE + x, y2 * board.SIZE + x2)
+
+
+def would_result_in(board: Board, is_white: bool, move_steps: MoveSteps, result: MetaTag) -> bool:
+	"is_white = is check/mate done by white. Returns true if performing move_steps would result in result (parameter) MetaTag"
+	
+	assert result in (Meta.TAG_CHECK, Meta.TAG_CHECKMATE)
+
+	make_move(board, move_steps)
+
+	try:
+		enemy_king_x, enemy_king_y = board.get_king_position(not is_white)
+
+		r = is_position_attacked(board, enemy_king_x, enemy_king_y, is_white)
+		
+		if r and result == Meta.TAG_CHECKMATE:
+			r = is_checkmate(board, not is_white)
+	finally:
+		unmake_move(board)
 
 	return r
 
 
 def is_checkmate(board: Board, is_white: bool) -> bool:
+	"Looks for a single legal evasion of the check, the moves are only generated until one is found"
 
-	king_x, king_y = board.get_pieces_positions(Piece.TYPE_KING, is_white)[0]
+	info = bitboard.get_check_info(board, is_white)
 
 	# 1. is king in check
-
-	if not is_position_attacked(board, king_x, king_y, not is_white):
+	if not info.checkers:
 		return False
 
-	# 2. can the check be cancelled
-	
-	# a. can the king move out of the check
-
-	positions = (
-		(-1, -1,), (0, -1), (1, -1),
-		(-1, 0), (0, 1),
-		(-1, 1), (0, 1), (1, 1),
-	)
-
-	for x, y in positions:
-		if board.is_position_valid(x, y):
-			if board.fields[x][y].type == Piece.TYPE_NONE \
-			and not is_position_attacked(board, x, y, not is_white):
-				# king can move out of the check
-				return False
+	own = board.occupancy[is_white]
+	king = info.king
 
-			elif board.fields[x][y].type != Piece.TYPE_NONE \
-			and  board.fields[x][y].is_white != is_white:
-				t = board.fields[x][y].type
+	# 2. can the king move out of the check (or capture the checking piece)
+	for square in bitboard.KING_TARGETS[king]:
+		if not own >> square & 1 and bitboard.is_legal_move(board, info, king, square):
+			return False
 
-				board.fields[x][y].type = Piece.TYPE_NONE
+	# 3. only the king can move in a double check
+	if info.is_double_check():
+		return True
 
-				is_attacked = is_position_attacked(board, x, y, not is_white)
+	# 4. can another piece capture the checking piece or block the check
+	pawns = board.bitboards[board.encode_piece(Piece.TYPE_PAWN, is_white)]
+	push = board.SIZE if is_white else -board.SIZE # from a square to the square the pawn came from
+	double_push_y = 4 if is_white else 3
 
-				board.fields[x][y].type = t
-				
-				if not is_attacked:
-					# king can capture the attacker
-					return False
+	evasions = info.evasions
 
-	# b. is number of attackers == 1:
-	attackers_positions = get_attackers_positions(board, king_x, king_y, not is_white)
-	if len(attackers_positions) == 1:
-		
-		x, y = attackers_positions[0]
+	while evasions:
+		lowest = evasions & -evasions
+		square = lowest.bit_length() - 1
+		evasions ^= lowest
 
-		if is_position_attacked(board, x, y, is_white):
+		if info.checkers & lowest:
+			# every piece attacking the checking piece can capture it
+			defenders = bitboard.get_attackers(board, square, is_white)
+		else:
+			# pawns can only block by moving forward
+			defenders = bitboard.get_attackers(board, square, is_white) & ~pawns
 
-			t = board.fields[x][y].type
-			board.fields[x][y].type = Piece.TYPE_NONE
+			source = square + push
+			if 0 <= source < board.SIZE * board.SIZE:
+				if pawns >> source & 1:
+					defenders |= 1 << source
+				elif square // board.SIZE == double_push_y and board.squares[source] == 0 and pawns >> (source + push) & 1:
+					defenders |= 1 << (source + push)
 
-			is_attacked = is_position_attacked(board, x, y, not is_white)
+		defenders &= ~(1 << king)
 
-			board.fields[x][y].type = t
+		while defenders:
+			lowest = defenders & -defenders
+			defenders ^= lowest
 
-			if not is_attacked:
-				# attacker can be captured
+			pin = info.pins.get(lowest.bit_length() - 1)
+			if pin is None or pin >> square & 1:
+				return False
+
+	# 5. en passant can capture a checking pawn or block a check
+	if board.en_passant_position is not None:
+		x2, y2 = board.en_passant_position
+		for x, y in bitboard.to_positions(bitboard.PAWN_ATTACKS[not is_white][board.to_square(x2, y2)] & pawns):
+			if is_move_legal(board, is_white, x, y, x2, y2):
 				return False
 
-		if board.fields[x][y].type != Piece.TYPE_KNIGHT:
-			attack_line = Mask()
-			dx = int((king_x - x) / abs(king_x - x)) if king_x != x else 0
-			dy = int((king_y - y) / abs(king_y - y)) if king_y != y else 0
-			test_line(board, attack_line, x, y, dx, dy, board.SIZE - 1)
-
-			for mx, row in enumerate(attack_line.fields):
-				for my, flags in enumerate(row):
-					if flags & Mask.FLAG_CAPTURE:
-						attackers_positions = get_attackers_positions(board, mx, my, is_white)
-					if attackers_positions and attackers_positions != ((king_x, king_y),):
-						# a piece can move in between the king and the attacker
-						# and the attacker isn't a knight
-						return False
-	
 	# checkmate
 	return True
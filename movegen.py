@@ -0,0 +1,113 @@
+import time
+
+import move
+import bitboard
+import input_parser
+from move import MoveSteps
+from data_types import Piece, Board, Mask, DEFAULT_BOARD_DATA
+
+from typing import Iterator
+
+
+def generate_legal_moves(board: Board, is_white: bool) -> list[MoveSteps]:
+	"Every move is a MoveSteps list, like the ones returned by input_parser.parse_and_complete"
+
+	moves: list[MoveSteps] = []
+	mask = Mask()
+
+	for x, y in board.get_all_pieces_positions():
+		if board.is_piece_white(x, y) != is_white:
+			continue
+
+		move.create_piece_mask(board, x, y, mask=mask)
+
+		for x2, y2 in bitboard.to_positions(mask.get_target_bits()):
+			if board.get_piece_type(x2, y2) == Piece.TYPE_KING:
+				continue
+
+			if move.is_move_legal(board, is_white, x, y, x2, y2):
+				moves.append([(x, y, x2, y2)])
+
+	for is_kingside in (True, False):
+		move_steps = input_parser.complete_castling(board, is_white, is_kingside)
+		if not isinstance(move_steps, Exception):
+			moves.append(move_steps)
+
+	return moves
+
+
+def perft(board: Board, is_white: bool, depth: int) -> int:
+	"Counts leaf nodes of the legal move tree, see https://www.chessprogramming.org/Perft"
+
+	# the search asks for attacked squares in every position, so its own copy of the board keeps attack maps,
+	# they would slow down every later change of the caller's board
+	board = board.copy()
+	bitboard.get_attack_maps(board)
+
+	return count_nodes(board, is_white, depth)
+
+
+def count_nodes(board: Board, is_white: bool, depth: int) -> int:
+
+	if depth == 0:
+		return 1
+
+	moves = generate_legal_moves(board, is_white)
+
+	if depth == 1:
+		return len(moves)
+
+	nodes = 0
+
+	for move_steps in moves:
+		move.make_move(board, move_steps)
+		nodes += count_nodes(board, not is_white, depth - 1)
+		move.unmake_move(board)
+
+	return nodes
+
+
+# (name, board_data, is_whites_turn, published node counts for depth 1, 2, ...)
+# pawns are always promoted to queens, so only depths without promotions are listed
+PerftPosition = tuple[str, list[str], bool, tuple[int, ...]]
+
+PERFT_POSITIONS: list[PerftPosition] = [
+	('initial', DEFAULT_BOARD_DATA, True, (20, 400, 8902, 197281)),
+	('kiwipete', [
+		'r___k__r',
+		'p_ppqpb_',
+		'bn__pnp_',
+		'___PN___',
+		'_p__P___',
+		'__N__Q_p',
+		'PPPBBPPP',
+		'R___K__R',
+	], True, (48, 2039, 97862)),
+	('position 3', [
+		'________',
+		'__p_____',
+		'___p____',
+		'KP_____r',
+		'_R___p_k',
+		'________',
+		'____P_P_',
+		'________',
+	], True, (14, 191, 2812, 43238, 674624)),
+]
+
+
+# (name, depth, nodes, expected nodes, seconds)
+PerftResult = tuple[str, int, int, int, float]
+
+def run_perft_suite(max_depth: int) -> Iterator[PerftResult]:
+
+	for name, board_data, is_white, expected in PERFT_POSITIONS:
+		for depth in range(1, min(max_depth, len(expected)) + 1):
+
+			board = Board(board_data)
+
+			start = time.perf_counter()
+			nodes = perft(board, is_white, depth)
+			elapsed = time.perf_counter() - start
+
+			yield (name, depth, nodes, expected[depth - 1], elapsed)
@@ -0,0 +1,169 @@
+# Position index of a PGN database: zobrist key -> moves played from the position, by which games and with what results
+#
+# File layout (little endian):
+#	magic, version, mtime and size of the source .pgn file
+#	move count, [length (H), utf-8 SAN] for every distinct move
+#	record count, keys (Q), moves (I), games (I), results (B) - stored column by column, sorted by key
+
+import os
+import sys
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+import game
+from data_types import Board
+
+
+OPENING_TREE_EXTENSION: str = '.tree'
+MAGIC: bytes = b'CHOT'
+VERSION: int = 2 # 2 - en passant squares only change keys, when a pawn can capture
+
+RESULTS: tuple[str, ...] = ('*', '1-0', '0-1', '1/2-1/2')
+
+# (move, game indexes, results)
+TreeEntry = tuple[str, list[int], list[str]]
+
+
+class OpeningTree:
+
+	def __init__(self) -> None:
+		self.moves: list[str] = []
+		self.keys: array = array('Q')
+		self.move_ids: array = array('I')
+		self.games: array = array('I')
+		self.results: array = array('B')
+
+	def __len__(self) -> int:
+		return len(self.keys)
+
+	def lookup(self, zobrist_key: int) -> list[TreeEntry]:
+		"Moves played from the position, most popular first"
+
+		start = bisect_left(self.keys, zobrist_key)
+		end = bisect_right(self.keys, zobrist_key, start)
+
+		entries: dict[str, TreeEntry] = {}
+
+		for i in range(start, end):
+			move = self.moves[self.move_ids[i]]
+			_, games, results = entries.setdefault(move, (move, [], []))
+			games.append(self.games[i])
+			results.append(RESULTS[self.results[i]])
+
+		return sorted(entries.values(), key=lambda entry: len(entry[1]), reverse=True)
+
+	def lookup_moves(self, moves: list[str]) -> list[TreeEntry] | Exception:
+		"Moves played after the given SAN moves from the starting position"
+
+		g = game.game_from_moves(moves, verbose=False)
+
+		if isinstance(g, Exception):
+			return g
+
+		return self.lookup(g.board.zobrist_key)
+
+	def lookup_fen(self, fen: str) -> list[TreeEntry] | Exception:
+		"Moves played from the position, however the games reached it"
+
+		try:
+			board = Board.from_fen(fen)
+		except Exception as e:
+			return e
+
+		return self.lookup(board.zobrist_key)
+
+	def save(self, path: str, source_stat: os.stat_result) -> None:
+		with open(path, 'wb') as file:
+			file.write(MAGIC)
+			file.write(struct.pack('<HQQ', VERSION, source_stat.st_mtime_ns, source_stat.st_size))
+
+			file.write(struct.pack('<I', len(self.moves)))
+			for move in self.moves:
+				data = move.encode()
+				file.write(struct.pack('<H', len(data)))
+				file.write(data)
+
+			file.write(struct.pack('<I', len(self.keys)))
+			for column in (self.keys, self.move_ids, self.games, self.results):
+				if sys.byteorder == 'big':
+					column = array(column.typecode, column)
+					column.byteswap()
+				column.tofile(file)
+
+	@classmethod
+	def load(cls, path: str, source_stat: os.stat_result) -> 'OpeningTree | None':
+		"Returns None if the file is from a different version or the source changed since it was built"
+
+		tree = cls()
+
+		with open(path, 'rb') as file:
+			if file.read(len(MAGIC)) != MAGIC:
+				return None
+
+			version, mtime, size = struct.unpack('<HQQ', file.read(struct.calcsize('<HQQ')))
+			if version != VERSION or not game.is_sidecar_fresh(mtime, size, source_stat):
+				return None
+
+			count, = struct.unpack('<I', file.read(4))
+			for _ in range(count):
+				length, = struct.unpack('<H', file.read(2))
+				tree.moves.append(file.read(length).decode())
+
+			count, = struct.unpack('<I', file.read(4))
+			for column in (tree.keys, tree.move_ids, tree.games, tree.results):
+				column.fromfile(file, count)
+				if sys.byteorder == 'big':
+					column.byteswap()
+
+		return tree
+
+
+def build_opening_tree(path: str, max_plies: int | None = None) -> OpeningTree:
+	"Replays every game of the file once, a game is recorded up to its first invalid move. Can throw exceptions"
+
+	records: list[tuple[int, int, int, int]] = []
+	move_ids: dict[str, int] = {}
+
+	for game_index, (tags, movetext) in enumerate(game.iter_pgn_file_games(path)):
+
+		result = RESULTS.index(tags['Result']) if tags.get('Result') in RESULTS else 0
+
+		moves = game.extract_moves(movetext)
+		if isinstance(moves, Exception):
+			continue
+
+		g = game.Game()
+
+		for ply, move in enumerate(moves):
+			if max_plies is not None and ply >= max_plies:
+				break
+
+			key = g.board.zobrist_key
+
+			if isinstance(game.make_turn(g, move), Exception):
+				break
+
+			records.append((key, move_ids.setdefault(move, len(move_ids)), game_index, result))
+
+	records.sort()
+
+	tree = OpeningTree()
+	tree.moves = list(move_ids)
+	tree.keys = array('Q', (record[0] for record in records))
+	tree.move_ids = array('I', (record[1] for record in records))
+	tree.games = array('I', (record[2] for record in records))
+	tree.results = array('B', (record[3] for record in records))
+
+	return tree
+
+
+def load_opening_tree(path: str) -> OpeningTree:
+	"Loads the tree stored next to the .pgn file, builds it if it's missing or stale. Can throw exceptions"
+
+	game.validate_pgn_path(path)
+
+	def save(tree_path: str, stat: os.stat_result, tree: OpeningTree) -> None:
+		tree.save(tree_path, stat)
+
+	return game.load_sidecar(path, OPENING_TREE_EXTENSION, build_opening_tree, OpeningTree.load, save)
@@ -0,0 +1,115 @@
+
+# Opt-in instrumentation of the hot functions. Nothing is wrapped until enable() is called,
+# so there is no overhead otherwise
+# WARNING: only the current process is measured, use --jobs 1 when profiling --validate
+
+import os
+import sys
+import time
+import atexit
+import inspect
+import functools
+
+import move
+import input_parser
+
+from types import ModuleType
+from typing import Callable
+
+
+PROFILE_ENVIRONMENT_VARIABLE: str = 'CHESS_PROFILE'
+PROFILED_MODULES: tuple[ModuleType, ...] = (move, input_parser)
+
+
+class FunctionStats:
+	__slots__ = ('calls', 'seconds', 'depth')
+
+	def __init__(self) -> None:
+		self.calls: int = 0
+		self.seconds: float = 0.0
+		self.depth: int = 0 # recursive calls aren't timed twice
+
+
+STATS: dict[str, FunctionStats] = {}
+_originals: list[tuple[ModuleType, str, Callable]] = []
+
+
+def wrap(name: str, function: Callable) -> Callable:
+
+	stats = STATS.setdefault(name, FunctionStats())
+	clock = time.perf_counter
+
+	@functools.wraps(function)
+	def wrapper(*args, **kwargs):
+		stats.calls += 1
+
+		if stats.depth:
+			return function(*args, **kwargs)
+
+		stats.depth += 1
+		start = clock()
+		try:
+			return function(*args, **kwargs)
+		finally:
+			stats.seconds += clock() - start
+			stats.depth -= 1
+
+	return wrapper
+
+
+def enable(report_at_exit=True) -> None:
+	"Replaces every function of the profiled modules with a wrapper. Calls between them go through the module, so they are measured too"
+
+	if _originals:
+		return
+
+	for module in PROFILED_MODULES:
+		for name, function in inspect.getmembers(module, inspect.isfunction):
+			if function.__module__ != module.__name__:
+				# imported from somewhere else
+				continue
+
+			_originals.append((module, name, function))
+			setattr(module, name, wrap(f'{module.__name__}.{name}', function))
+
+	if report_at_exit:
+		atexit.register(print_report)
+
+
+def disable() -> None:
+	"Restores the original functions, the collected stats are kept"
+
+	for module, name, function in _originals:
+		setattr(module, name, function)
+
+	_originals.clear()
+	atexit.unregister(print_report)
+
+
+def reset() -> None:
+	for stats in STATS.values():
+		stats.calls = 0
+		stats.seconds = 0.0
+
+
+def is_enabled() -> bool:
+	return bool(_originals)
+
+
+def is_requested(sys_argv: list[str]) -> bool:
+	return '--profile' in sys_argv or os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, '') not in ('', '0')
+
+
+def print_report(file=sys.stderr) -> None:
+	"Functions sorted by their total time, which includes the time of functions they call"
+
+	called = [(name, stats) for name, stats in STATS.items() if stats.calls]
+
+	if not called:
+		return
+
+	print('Profile:', file=file)
+	print(f'\t{"function":<40} {"calls":>10} {"total":>10} {"per call":>10}', file=file)
+
+	for name, stats in sorted(called, key=lambda item: item[1].seconds, reverse=True):
+		print(f'\t{name:<40} {stats.calls:>10} {stats.seconds:>9.3f}s {stats.seconds / stats.calls * 1e6:>8.1f}us', file=file)
@@ -0,0 +1,151 @@
+# Header tags of every game in a PGN file, stored column by column next to the file (<file>.tags)
+# Only tag lines are parsed, movetext lines are skipped after looking at their first character
+
+import os
+import re
+import fnmatch
+
+import game
+
+
+TAG_INDEX_EXTENSION: str = '.tags'
+BYTE_ORDER_MARK: bytes = b'\xef\xbb\xbf'
+
+# name, operator, value - ex. 'WhiteElo>=2600', 'ECO=C0*'
+FILTER_PATTERN = re.compile(r'^(\w+)(>=|<=|=|>|<)(.*)$')
+
+Filter = tuple[str, str, str]
+
+
+class TagTable:
+
+	def __init__(self) -> None:
+		self.offsets: list[int] = [] # byte offset of every game, like game.build_pgn_index
+		self.columns: dict[str, list[str]] = {} # tag name -> value for every game, '' if the game doesn't have it
+
+	def __len__(self) -> int:
+		return len(self.offsets)
+
+	def get_tags(self, game_index: int) -> dict[str, str]:
+		return {name: column[game_index] for name, column in self.columns.items() if column[game_index]}
+
+	def filter(self, filters: list[Filter]) -> list[int]:
+		"Returns indexes of games matching all of the filters"
+
+		indexes = range(len(self))
+
+		for name, operator, value in filters:
+			column = self.columns.get(name)
+
+			if column is None:
+				return []
+
+			indexes = [i for i in indexes if matches(column[i], operator, value)]
+
+		return list(indexes)
+
+
+def parse_filter(text: str) -> Filter | Exception:
+	match = FILTER_PATTERN.match(text)
+
+	if match is None:
+		return Exception(f'Invalid filter "{text}" (expected <tag><operator><value>, ex. White=Adams)')
+
+	name, operator, value = match.groups()
+
+	return (name, operator, value)
+
+
+def matches(tag_value: str, operator: str, value: str) -> bool:
+	"""= is a case insensitive wildcard match if value contains '*', '?' or '[', otherwise a substring match
+	<, >, <= and >= compare numbers, tags that aren't numbers don't match"""
+
+	if operator == '=':
+		if any(char in value for char in '*?['):
+			return fnmatch.fnmatchcase(tag_value.lower(), value.lower())
+		return value.lower() in tag_value.lower()
+
+	try:
+		a = float(tag_value)
+		b = float(value)
+	except ValueError:
+		return False
+
+	match operator:
+		case '<':
+			return a < b
+		case '>':
+			return a > b
+		case '<=':
+			return a <= b
+		case '>=':
+			return a >= b
+	
+	return False
+
+
+def build_tag_table(path: str) -> TagTable:
+	"Single pass over the file, that only parses tag lines"
+
+	table = TagTable()
+
+	with open(path, 'rb') as file:
+
+		offset = 0
+		started_reading_moves = False
+
+		for line in file:
+			length = len(line)
+
+			if not table.offsets:
+				table.offsets.append(0)
+				# a byte order mark would hide the first tag
+				line = line.removeprefix(BYTE_ORDER_MARK) or b'\n'
+
+			first = line[0]
+
+			if first == 91: # '['
+				if started_reading_moves:
+					table.offsets.append(offset)
+					started_reading_moves = False
+
+				tag = game.parse_pgn_tag(line.decode(errors='replace'))
+
+				if tag is not None:
+					name, value = tag
+					column = table.columns.get(name)
+					if column is None:
+						column = table.columns[name] = [''] * len(table.offsets)
+					column.extend([''] * (len(table.offsets) - len(column)))
+					column[-1] = value
+
+			elif first == 49: # '1'
+				started_reading_moves = True
+
+			offset += length
+
+	for column in table.columns.values():
+		column.extend([''] * (len(table.offsets) - len(column)))
+
+	return table
+
+
+def load_tag_table(path: str) -> TagTable:
+	"Loads the table stored next to the .pgn file, builds it if it's missing or stale. Can throw exceptions"
+
+	game.validate_pgn_path(path)
+
+	def load(table_path: str, stat: os.stat_result) -> TagTable | None:
+		data = game.read_json_sidecar(table_path, stat)
+		if data is None:
+			return None
+
+		table = TagTable()
+		table.offsets = data['offsets']
+		table.columns = data['columns']
+		return table
+
+	def save(table_path: str, stat: os.stat_result, table: TagTable) -> None:
+		game.write_json_sidecar(table_path, stat, {'offsets': table.offsets, 'columns': table.columns})
+
+	return game.load_sidecar(path, TAG_INDEX_EXTENSION, build_tag_table, load, save)
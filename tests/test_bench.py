@@ -0,0 +1,65 @@
+import questionable_import
+
+import os
+import shutil
+import tempfile
+import unittest
+import bench
+import game
+import move
+import input_parser
+
+
+class TestBench(unittest.TestCase):
+
+	def test_run_benchmark(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		# run_benchmark writes the .idx sidecar next to the file
+		path = shutil.copy('tests/data/Adams 10.pgn', os.path.join(directory, 'Adams 10.pgn'))
+
+		functions = (input_parser.parse_and_complete, input_parser.verify_meta, move.execute_a_move)
+		result = bench.run_benchmark(path)
+		_, invalid, _ = game.validate_pgn_file(path, 1)
+
+		self.assertEqual(result['games'], 10)
+		self.assertEqual(result['invalid_games'], invalid)
+		self.assertGreater(result['moves'], 0)
+		self.assertEqual(tuple(result['phases']), bench.PHASES)
+		self.assertTrue(all(time > 0 for time in result['phases'].values()))
+
+		# the timed functions are put back
+		self.assertEqual((input_parser.parse_and_complete, input_parser.verify_meta, move.execute_a_move), functions)
+
+	def test_compare_results(self):
+		baseline = {
+			'moves': 100,
+			'games_per_second': 10.0,
+			'moves_per_second': 1000.0,
+			'phases': {'read': 0.01, 'parse_and_complete': 0.1, 'execute_a_move': 0.05},
+		}
+
+		# twice the moves in twice the time isn't a regression
+		result = {
+			'moves': 200,
+			'games_per_second': 10.0,
+			'moves_per_second': 1000.0,
+			'phases': {'read': 0.02, 'parse_and_complete': 0.2, 'execute_a_move': 0.1},
+		}
+
+		self.assertEqual(bench.compare_results(result, baseline), [])
+
+		result['moves_per_second'] = 850.0
+		result['phases']['execute_a_move'] = 0.15
+
+		regressions = bench.compare_results(result, baseline)
+
+		self.assertEqual(len(regressions), 2)
+		self.assertTrue(regressions[0].startswith('moves_per_second'))
+		self.assertTrue(regressions[1].startswith('execute_a_move'))
+		self.assertEqual(bench.compare_results(result, baseline, threshold=0.6), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,15 +1,118 @@
 
 import unittest
+from copy import copy
 
 import questionable_import
 import move
-from data_types import Board, mask_from_list
+from data_types import Piece, Board, Mask, SquareGrid, INITIAL_FEN, mask_from_list
 
-# class TestDataTypes(unittest.TestCase):
+class TestDataTypes(unittest.TestCase):
+
+	def test_board_from_list(self):
+		board = Board([
+			'k_______',
+			'________',
+			'________',
+			'________',
+			'________',
+			'________',
+			'_______P',
+			'_______K',
+		])
+
+		self.assertEqual(len(board.squares), 64)
+		self.assertEqual(board.get_piece_type(0, 0), Piece.TYPE_KING)
+		self.assertFalse(board.is_piece_white(0, 0))
+		self.assertEqual(board.get_piece_type(7, 6), Piece.TYPE_PAWN)
+		self.assertTrue(board.is_piece_white(7, 6))
+		self.assertTrue(board.is_position_empty(3, 3))
+		self.assertEqual(board.get_all_pieces_positions(), [(0, 0), (7, 6), (7, 7)])
+		self.assertEqual(board.get_pieces_positions(Piece.TYPE_KING, True), ((7, 7),))
+
+	def test_board_fields_view(self):
+		board = Board()
+
+		self.assertEqual(board.fields[4][7].type, Piece.TYPE_KING)
+		self.assertTrue(board.fields[4][7].is_white)
+		self.assertEqual(repr(board.fields[3][0]), 'q')
+
+		board.fields[4][4] = copy(board.fields[4][6])
+		board.fields[4][6].type = Piece.TYPE_NONE
+
+		self.assertEqual(board.get_piece_type(4, 4), Piece.TYPE_PAWN)
+		self.assertTrue(board.is_piece_white(4, 4))
+		self.assertTrue(board.is_position_empty(4, 6))
+
+	def test_board_copy(self):
+		board = Board()
+		board.moved_pieces.append((4, 4))
+
+		board_copy = board.copy()
+		board_copy.remove_piece(0, 0)
+		board_copy.moved_pieces.append((0, 0))
+
+		self.assertEqual(board.get_piece_type(0, 0), Piece.TYPE_ROOK)
+		self.assertEqual(board.moved_pieces, [(4, 4)])
+		self.assertEqual(board_copy.squares[1:], board.squares[1:])
+
+	def test_fen(self):
+		board = Board.from_fen(INITIAL_FEN)
+
+		self.assertEqual(board.squares, Board().squares)
+		self.assertEqual(board.zobrist_key, Board().zobrist_key)
+		self.assertEqual(board.to_fen(), INITIAL_FEN)
+
+		# castling rights are stored as moved rooks, black to move is a part of the zobrist key
+		fen = 'r3k2r/8/8/8/8/8/8/R3K2R b Kq - 3 20'
+		board = Board.from_fen(fen)
+
+		self.assertEqual(board.get_castling_rights(), Board.CASTLING_WHITE_KINGSIDE | Board.CASTLING_BLACK_QUEENSIDE)
+		self.assertEqual(sorted(board.moved_pieces), [(0, 7), (7, 0)])
+		self.assertEqual(board.zobrist_key, board.compute_zobrist_key(False))
+		self.assertEqual(board.to_fen(False, 3, 20), fen)
+
+		# the pawn, that can be captured en passant, is the last moved piece
+		fen = 'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3'
+		board = Board.from_fen(fen)
+
+		self.assertEqual(board.en_passant_position, (5, 2))
+		self.assertEqual(board.moved_pieces[-1], (5, 3))
+		self.assertEqual(board.to_fen(True, 0, 3), fen)
+
+		for invalid in (
+			'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1',
+			'rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+			'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1',
+			'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e3 0 1',
+			'8/8/8/8/8/8/8/8 w - - 0 1',
+		):
+			with self.assertRaises(Exception):
+				Board.from_fen(invalid)
+
+	def test_mask_bitsets(self):
+		mask = Mask()
+
+		self.assertEqual(mask.fields[3][3], Mask.FLAG_NONE)
+
+		mask.fields[3][3] = Mask.FLAG_MOVE | Mask.FLAG_CAPTURE
+		mask.set_flags(0, 7, Mask.FLAG_EN_PASSANT | Mask.FLAG_CAPTURE)
+
+		self.assertEqual(mask.get_flags(3, 3), Mask.FLAG_MOVE | Mask.FLAG_CAPTURE)
+		self.assertEqual(mask.capture_bits, 1 << Mask.to_square(3, 3) | 1 << Mask.to_square(0, 7))
+		self.assertEqual(mask.en_passant_bits, 1 << Mask.to_square(0, 7))
+
+		mask.fields[3][3] = Mask.FLAG_NONE
+		self.assertEqual(mask.get_target_bits(), 1 << Mask.to_square(0, 7))
+
+		mask.clear()
+		self.assertEqual(mask.fields, Mask().fields)
+
+		# only the bitsets are stored
+		self.assertFalse(hasattr(mask, '__dict__'))
+
+		with self.assertRaises(TypeError):
+			SquareGrid()
 
-	# def test_board_from_list(self):
-	# 	pass
-		
 
 
 
@@ -0,0 +1,282 @@
+import questionable_import
+
+import os
+import shutil
+import tempfile
+import unittest
+import game
+from data_types import Token
+
+
+class TestGame(unittest.TestCase):
+
+	def setUp(self) -> None:
+		self.directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.directory)
+
+	def copy_data(self, name: str) -> str:
+		"read_pgn_file_data and PgnFile save an index next to the file, so they read copies of the test data"
+
+		path = os.path.join(self.directory, name)
+
+		if not os.path.exists(path):
+			shutil.copy(os.path.join('tests', 'data', name), path)
+
+		return path
+
+	def test_build_pgn_index(self):
+		self.assertEqual(len(game.build_pgn_index('tests/data/Adams 10.pgn')), 10)
+		self.assertEqual(game.build_pgn_index('tests/data/test.pgn'), [0])
+		self.assertEqual(game.build_pgn_index('tests/data/empty.pgn'), [])
+
+	def test_read_pgn_file_data(self):
+		data = game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 2)
+		self.assertTrue(data.startswith('[Event "Lloyds Bank op"]'))
+		self.assertIn('[Round "4"]', data)
+		self.assertEqual(data.count('[Event '), 1)
+
+		with self.assertRaises(Exception):
+			game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 10)
+
+		with self.assertRaises(Exception):
+			game.read_pgn_file_data(self.copy_data('empty.pgn'))
+
+	def test_stale_pgn_index(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		shutil.copy('tests/data/test.pgn', path)
+
+		self.assertEqual(len(game.load_pgn_index(path)), 1)
+		self.assertTrue(os.path.exists(path + game.PGN_INDEX_EXTENSION))
+
+		with open('tests/data/test.pgn', 'r') as source, open(path, 'a') as file:
+			file.write('\n\n' + source.read())
+
+		self.assertEqual(len(game.load_pgn_index(path)), 2)
+		self.assertEqual(game.read_pgn_file_data(path, 1).strip(), game.read_pgn_file_data(path, 0).strip())
+
+	def test_iter_pgn_file_games(self):
+		games = list(game.iter_pgn_file_games('tests/data/Adams 10.pgn'))
+
+		self.assertEqual(len(games), 10)
+
+		tags, movetext = games[2]
+		self.assertEqual(tags['Round'], '4')
+		self.assertEqual(tags['Black'], 'Adams, Michael')
+		self.assertNotIn('[', movetext)
+		self.assertEqual(game.extract_moves(movetext), game.extract_moves(game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 2)))
+
+		self.assertEqual(list(game.iter_pgn_file_games('tests/data/empty.pgn')), [])
+		self.assertEqual(len(list(game.iter_pgn_file_games('tests/data/no_meta.pgn'))), 1)
+
+	def test_byte_order_mark(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		with open(path, 'w', encoding='utf-8-sig') as file:
+			file.write('[Event "x"]\n[White "a"]\n\n1.e4 e5 2.Nf3 *\n')
+
+		data = game.read_pgn_file_data(path)
+		self.assertTrue(data.startswith('[Event "x"]'))
+		self.assertEqual(game.extract_moves(data), ['e4', 'e5', 'Nf3'])
+
+		with game.PgnFile(path) as pgn_file:
+			self.assertEqual(pgn_file.get_game_data(0), data)
+
+		(tags, movetext), = game.iter_pgn_file_games(path)
+		self.assertEqual(tags, {'Event': 'x', 'White': 'a'})
+		self.assertNotIn('[', movetext)
+		self.assertEqual(game.validate_pgn_file(path, 1), (1, 0, {}))
+
+	def test_iter_pgn_file_games_encoding(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		with open(path, 'w', encoding='utf-8') as file:
+			file.write('[White "Müller, Jürgen"]\n[Black "Šulc, Ľuboš"]\n\n1.e4 e5 *\n')
+
+		# the same text as the other readers, whatever the locale's encoding is
+		(tags, movetext), = game.iter_pgn_file_games(path)
+		self.assertEqual(tags['White'], 'Müller, Jürgen')
+		self.assertEqual(tags['Black'], 'Šulc, Ľuboš')
+		self.assertIn('[Black "Šulc, Ľuboš"]', game.read_pgn_file_data(path))
+
+	def test_parse_pgn_tag(self):
+		self.assertEqual(game.parse_pgn_tag('[ECO "C05"]'), ('ECO', 'C05'))
+		self.assertEqual(game.parse_pgn_tag('[Event "\\"Open\\""]'), ('Event', '"Open"'))
+		self.assertEqual(game.parse_pgn_tag('1.e4 e5'), None)
+
+	def test_validate_pgn_file(self):
+		result = game.validate_pgn_file('tests/data/Adams 10.pgn', 1)
+
+		valid, invalid, errors = result
+		self.assertEqual(valid + invalid, 10)
+		self.assertEqual(sum(errors.values()), invalid)
+
+		self.assertEqual(game.validate_pgn_file('tests/data/Adams 10.pgn', 2), result)
+
+		# ends with a checkmate
+		self.assertEqual(game.validate_pgn_file('tests/data/test.pgn', 1), (1, 0, {}))
+
+	def test_tokenize_movetext(self):
+		tokens = list(game.tokenize_movetext('1.e4!? {best (by test)} 1...c5 $1 (1...e5 2.Nf3 (2.f4)) 2.Nf3 ; comment\n0-0 1/2-1/2'))
+
+		self.assertEqual(tokens, [
+			(Token.TYPE_MOVE_NUMBER, '1'),
+			(Token.TYPE_MOVE, 'e4'),
+			(Token.TYPE_NAG, '!?'),
+			(Token.TYPE_COMMENT, 'best (by test)'),
+			(Token.TYPE_MOVE_NUMBER, '1'),
+			(Token.TYPE_MOVE, 'c5'),
+			(Token.TYPE_NAG, '$1'),
+			(Token.TYPE_VARIATION, '1...e5 2.Nf3 (2.f4)'),
+			(Token.TYPE_MOVE_NUMBER, '2'),
+			(Token.TYPE_MOVE, 'Nf3'),
+			(Token.TYPE_COMMENT, ' comment'),
+			(Token.TYPE_MOVE, '0-0'),
+			(Token.TYPE_RESULT, '1/2-1/2'),
+		])
+
+	def test_extract_moves(self):
+		moves = game.extract_moves(game.read_pgn_file_data(self.copy_data('with_comments.pgn')))
+
+		self.assertEqual(moves, game.extract_moves(game.read_pgn_file_data(self.copy_data('test.pgn'))))
+		self.assertEqual(moves[:4], ['e4', 'c6', 'd4', 'd5'])
+		self.assertEqual(moves[-1], 'Qd7#')
+
+		# the result is only removed, when it's present
+		self.assertEqual(game.extract_moves('1.e4 e5 2.Nf3 1/2-1/2'), ['e4', 'e5', 'Nf3'])
+		self.assertEqual(game.extract_moves('1.e4 e5 2.Nf3'), ['e4', 'e5', 'Nf3'])
+		self.assertIsInstance(game.extract_moves('[Result "*"] *'), Exception)
+
+	def test_trust_annotations(self):
+		# wrong annotations are only verified by default
+		moves = ['e4+', 'e5', 'Nf3#', 'Nc6']
+
+		self.assertIsInstance(game.game_from_moves(moves, verbose=False), Exception)
+
+		g = game.game_from_moves(moves, trust_annotations=True)
+		self.assertIsInstance(g, game.Game)
+		self.assertEqual(g.board.zobrist_key, game.game_from_moves(['e4', 'e5', 'Nf3', 'Nc6']).board.zobrist_key)
+
+		# illegal moves are still rejected
+		self.assertIsInstance(game.game_from_moves(['e5'], verbose=False, trust_annotations=True), Exception)
+
+		data = game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 1)
+		self.assertEqual(
+			game.game_from_pgn_data(data, trust_annotations=True).board.squares,
+			game.game_from_pgn_data(data).board.squares
+		)
+
+	def test_game_from_fen(self):
+		moves = ['e4', 'Nf6', 'e5', 'd5']
+		g = game.game_from_moves(moves)
+
+		self.assertEqual(g.to_fen(), 'rnbqkb1r/ppp1pppp/5n2/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3')
+
+		# continuing from the position is the same as replaying it from the start
+		h = game.Game.from_fen(g.to_fen())
+		self.assertEqual(h.board.zobrist_key, g.board.zobrist_key)
+
+		for move_input in ('exd6', 'Qxd6', 'Nc3', 'Nc6'):
+			self.assertIsNone(game.make_turn(g, move_input))
+			self.assertIsNone(game.make_turn(h, move_input))
+
+		self.assertEqual(h.to_fen(), g.to_fen())
+		self.assertEqual(h.board.zobrist_key, g.board.zobrist_key)
+
+		with self.assertRaises(Exception):
+			game.Game.from_fen('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1')
+
+	def test_position_at(self):
+		moves = game.extract_moves(game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 1))
+		g = game.game_from_moves(moves)
+
+		self.assertEqual(g.get_ply_count(), len(moves))
+		self.assertEqual(len(g.snapshots), -(-len(moves) // game.HISTORY_SNAPSHOT_INTERVAL))
+
+		for ply in (0, 1, game.HISTORY_SNAPSHOT_INTERVAL, 57, len(moves) - 1, len(moves)):
+			position = g.position_at(ply)
+			replayed = game.game_from_moves(moves[:ply])
+
+			self.assertEqual(position.to_fen(), replayed.to_fen())
+			self.assertEqual(position.board.zobrist_key, replayed.board.zobrist_key)
+			self.assertEqual(position.move_sequence, moves[:ply])
+
+		# the restored game can be continued, without changing the original
+		position = g.position_at(57)
+		for move_input in moves[57:]:
+			self.assertIsNone(game.make_turn(position, move_input))
+
+		self.assertEqual(position.to_fen(), g.to_fen())
+		self.assertEqual(len(position.snapshots), len(g.snapshots))
+		self.assertEqual(g.position_at(len(moves)).board.squares, g.board.squares)
+
+		with self.assertRaises(Exception):
+			g.position_at(len(moves) + 1)
+
+		# the interval bounds the number of snapshots, castling and en passant are replayed too
+		g = game.Game.from_fen('r3k2r/8/8/8/3p4/8/4P3/R3K2R w KQkq - 0 1', snapshot_interval=2)
+		for move_input in ('e4', 'dxe3', 'O-O', 'O-O-O', 'Rf2', 'exf2+'):
+			self.assertIsNone(game.make_turn(g, move_input))
+
+		self.assertEqual(len(g.snapshots), 3)
+		self.assertEqual(g.position_at(3).to_fen(), 'r3k2r/8/8/8/8/4p3/8/R4RK1 b kq - 1 2')
+		self.assertEqual(g.position_at(6).to_fen(), g.to_fen())
+
+	def test_zobrist_key(self):
+		g = game.Game()
+		keys = [g.board.zobrist_key]
+
+		for move_input in game.extract_moves(game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), 1)):
+			self.assertIsNone(game.make_turn(g, move_input))
+			self.assertEqual(g.board.zobrist_key, g.board.compute_zobrist_key(g.is_whites_turn))
+			keys.append(g.board.zobrist_key)
+
+		self.assertEqual(len(set(keys)), len(keys))
+
+		# the same position reached by a different move order
+		a = game.game_from_moves(['Nf3', 'Nf6', 'Nc3', 'Nc6'])
+		b = game.game_from_moves(['Nc3', 'Nc6', 'Nf3', 'Nf6'])
+		self.assertEqual(a.board.zobrist_key, b.board.zobrist_key)
+
+		# the same pieces, but castling isn't possible anymore
+		c = game.game_from_moves(['Nf3', 'Nf6', 'Rg1', 'Nc6', 'Rh1', 'Nb8', 'Nc3', 'Nc6'])
+		self.assertNotEqual(a.board.zobrist_key, c.board.zobrist_key)
+		self.assertEqual(bytes(a.board.squares), bytes(c.board.squares))
+
+		# the en passant square is only a part of the key, when a pawn can capture
+		key = game.game_from_moves(['e4']).board.zobrist_key
+		self.assertEqual(key, game.Game.from_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1').board.zobrist_key)
+		self.assertEqual(key, game.Game.from_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1').board.zobrist_key)
+
+		g = game.game_from_moves(['e4', 'd5', 'e5', 'f5'])
+		self.assertEqual(g.board.zobrist_key, game.Game.from_fen(g.to_fen()).board.zobrist_key)
+		self.assertNotEqual(g.board.zobrist_key, game.Game.from_fen(g.to_fen().replace(' f6 ', ' - ')).board.zobrist_key)
+
+	def test_find_game_offsets(self):
+		data = b'[Event "a"]\n\n1.e4 e5 1-0\n\n[Event "b"]\n[Round "2"]\n1.d4 d5\n10.c4 *\n'
+		self.assertEqual(game.find_game_offsets(data), [0, data.index(b'[Event "b"]')])
+		self.assertEqual(game.find_game_offsets(b'1.e4 e5 *\n[Event "a"]\n1.d4'), [0, 10])
+		self.assertEqual(game.find_game_offsets(b''), [])
+
+	def test_pgn_file(self):
+		with game.PgnFile(self.copy_data('Adams 10.pgn')) as pgn_file:
+			self.assertEqual(len(pgn_file), 10)
+
+			with pgn_file.get_game_bytes(4) as view:
+				self.assertTrue(bytes(view).startswith(b'[Event '))
+
+			for i, data in enumerate(pgn_file):
+				self.assertEqual(data, game.read_pgn_file_data(self.copy_data('Adams 10.pgn'), i))
+
+		with game.PgnFile(self.copy_data('empty.pgn')) as pgn_file:
+			self.assertEqual(list(pgn_file), [])
+
+
+if __name__ == '__main__':
+	unittest.main()
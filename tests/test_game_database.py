@@ -0,0 +1,61 @@
+import questionable_import
+
+import os
+import shutil
+import tempfile
+import unittest
+import game
+import game_database
+
+
+class TestGameDatabase(unittest.TestCase):
+
+	def test_encode_game(self):
+		g = game.game_from_moves(['e4', 'd5', 'exd5', 'Qxd5', 'Nc3', 'Qa5'])
+		tags = {'White': 'Müller, Ö', 'Result': '*'}
+
+		data = game_database.encode_game(tags, g.moves)
+		self.assertEqual(len(data), 2 + sum(2 + len(text.encode()) for text in ('White', 'Müller, Ö', 'Result', '*')) + 2 + 2 * 6)
+
+		decoded_tags, moves = game_database.decode_game(data)
+		self.assertEqual(decoded_tags, tags)
+		self.assertEqual(moves, g.moves)
+
+		h = game_database.game_from_record(moves)
+		self.assertEqual(h.to_fen(), g.to_fen())
+		self.assertEqual(h.board.zobrist_key, g.board.zobrist_key)
+
+	def test_export_and_read(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games' + game_database.GAME_DATABASE_EXTENSION)
+
+		valid, invalid, _ = game.validate_pgn_file('tests/data/Adams 10.pgn', 1)
+		self.assertEqual(game_database.export_pgn_file('tests/data/Adams 10.pgn', path), (valid, invalid))
+		self.assertLess(os.path.getsize(path), os.path.getsize('tests/data/Adams 10.pgn'))
+
+		pgn_games = list(game.iter_pgn_file_games('tests/data/Adams 10.pgn'))
+
+		with game_database.GameDatabase(path) as database:
+			self.assertEqual(len(database), valid)
+
+			for i, (tags, moves) in enumerate(database):
+				g = game.game_from_pgn_data(pgn_games[i][1])
+
+				self.assertEqual(tags, pgn_games[i][0])
+				self.assertEqual(moves, g.moves)
+				self.assertEqual(database.get_game(i).to_fen(), g.to_fen())
+
+		with open(path, 'wb') as file:
+			file.write(b'[Event "?"]\n')
+
+		with self.assertRaises(Exception):
+			game_database.GameDatabase(path)
+
+		with self.assertRaises(Exception):
+			game_database.GameDatabase(os.path.join(directory, 'missing.cgdb'))
+
+
+if __name__ == '__main__':
+	unittest.main()
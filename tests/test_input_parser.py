@@ -72,6 +72,24 @@ class TestInputParser(unittest.TestCase):
 			str(input_parser.complete_simple_move(self.board_1, False, input_parser.parse_simple_move('a4'))),
 			"Move is not possible"
 		)
+
+		# the knight on c3 is pinned, so only the one on g1 can go to e2
+		board = Board([
+			'____k___',
+			'________',
+			'________',
+			'________',
+			'_b______',
+			'__N_____',
+			'________',
+			'____K_N_',
+		])
+
+		self.assertEqual(input_parser.complete_simple_move(board, True, input_parser.parse_simple_move('Ne2')), [(6, 7, 4, 6)])
+		self.assertEqual(
+			str(input_parser.complete_simple_move(board, True, input_parser.parse_simple_move('Nd5'))),
+			"Move is not possible due to a check"
+		)
 		
 	# def test_complete_castling(self):
 	# 	print("TEST CASTLING")
@@ -82,6 +100,43 @@ class TestInputParser(unittest.TestCase):
 	# 	except ValueError:
 	# 		print(f'ERRRORRR: {e}')
 
+	def test_move_cache(self):
+		cache = input_parser.MOVE_CACHE
+		self.addCleanup(setattr, cache, 'max_size', cache.max_size)
+		cache.clear()
+
+		self.assertEqual(input_parser.parse_and_complete(self.board_1, True, 'e4'), [(4, 6, 4, 4)])
+		self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+		# a different board in the same position
+		self.assertEqual(input_parser.parse_and_complete(Board(), True, 'e4'), [(4, 6, 4, 4)])
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+		# errors are cached too
+		error = input_parser.parse_and_complete(self.board_1, True, 'e5')
+		self.assertIsInstance(error, Exception)
+		self.assertIs(input_parser.parse_and_complete(self.board_1, True, 'e5'), error)
+		self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+		# trusted and verified results of the same input are cached separately
+		error = input_parser.parse_and_complete(self.board_1, True, 'e4+')
+		self.assertIsInstance(error, Exception)
+		self.assertEqual(input_parser.parse_and_complete(self.board_1, True, 'e4+', trust_annotations=True), [(4, 6, 4, 4)])
+		self.assertIs(input_parser.parse_and_complete(self.board_1, True, 'e4+'), error)
+		self.assertIs(cache.entries[(self.board_1.zobrist_key, True, 'e4+', False)], error)
+		self.assertEqual(cache.entries[(self.board_1.zobrist_key, True, 'e4+', True)], [(4, 6, 4, 4)])
+		self.assertEqual((cache.hits, cache.misses), (3, 4))
+
+		# the least recently used entry is evicted
+		cache.max_size = 4
+		input_parser.parse_and_complete(self.board_1, True, 'd4')
+		self.assertEqual(len(cache.entries), 4)
+		self.assertNotIn((self.board_1.zobrist_key, True, 'e4', False), cache.entries)
+		self.assertIn((self.board_1.zobrist_key, True, 'e5', False), cache.entries)
+		self.assertIn((self.board_1.zobrist_key, True, 'd4', False), cache.entries)
+
+		cache.clear()
+
 
 if __name__ == '__main__':
 	unittest.main()
\ No newline at end of file
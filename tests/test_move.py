@@ -1,9 +1,16 @@
 
 import unittest
+import random
 
 import questionable_import
 import move
-from data_types import Board, mask_from_list
+import bitboard
+from data_types import Piece, Board, mask_from_list
+
+
+def random_board(rng: random.Random) -> Board:
+	chars = 'pppppprnbqkPPPPPPRNBQK' + '_' * 40
+	return Board([''.join(rng.choice(chars) for _ in range(8)) for _ in range(8)])
 
 class TestMove(unittest.TestCase):
 
@@ -261,6 +268,26 @@ class TestMove(unittest.TestCase):
 		self.assertEqual(move.is_checkmate(board, False), True)
 
 
+	def test_is_checkmate_evasions(self):
+		positions = (
+			# the king's neighbours are relative to the king
+			('k7/8/8/8/8/8/8/r6K w - - 0 1', False),
+			('6rk/5Npp/8/8/8/8/8/7K b - - 0 1', True),
+			# the rook can block the check
+			('R5k1/5ppp/8/8/8/8/4r3/7K b - - 0 1', False),
+			('R5k1/5ppp/8/8/8/8/8/7K b - - 0 1', True),
+			# a pawn can block the check by moving two squares, unless it's blocked itself
+			('k7/8/8/q6b/8/8/1P3PPP/3BKR2 w - - 0 1', False),
+			('k7/8/8/q6b/8/1n6/1P3PPP/3BKR2 w - - 0 1', True),
+			# the checking pawn can be captured en passant
+			('8/8/2QB4/k7/1Pp5/7B/8/7K b - b3 0 1', False),
+			('8/8/2QB4/k7/1P6/7B/8/7K b - b3 0 1', True),
+		)
+
+		for fen, is_checkmate in positions:
+			board = Board.from_fen(fen)
+			self.assertEqual(move.is_checkmate(board, fen.split()[1] == 'w'), is_checkmate, fen)
+
 	def test_is_position_attacked(self):
 		board = Board([
 			'K______R',
@@ -319,6 +346,211 @@ class TestMove(unittest.TestCase):
 				self.assertEqual(board.fields[x][y].is_white, answer.fields[x][y].is_white)
 		
 
+	def test_bitboard_attacks_match_masks(self):
+		rng = random.Random(0)
+		self.addCleanup(setattr, move, 'USE_BITBOARDS', True)
+
+		for _ in range(20):
+			board = random_board(rng)
+
+			empty = [(x, y) for x in range(8) for y in (2, 5) if board.is_position_empty(x, y)]
+			board.en_passant_position = rng.choice(empty) if empty else None
+
+			for x in range(8):
+				for y in range(8):
+					for by_white in (True, False):
+						move.USE_BITBOARDS = True
+						attacked = move.is_position_attacked(board, x, y, by_white)
+						attackers = move.get_attackers_positions(board, x, y, by_white)
+
+						move.USE_BITBOARDS = False
+						self.assertEqual(attacked, move.is_position_attacked(board, x, y, by_white))
+						self.assertEqual(attackers, move.get_attackers_positions(board, x, y, by_white))
+
+
+	def test_check_info(self):
+		board = Board([
+			'____k___',
+			'____r___',
+			'________',
+			'________',
+			'_b______',
+			'__N___n_',
+			'____B___',
+			'____K___',
+		])
+
+		info = bitboard.compute_check_info(board, True)
+
+		self.assertEqual(info.king, Board.to_square(4, 7))
+		self.assertFalse(info.is_check())
+		self.assertEqual(set(info.pins), {Board.to_square(2, 5), Board.to_square(4, 6)})
+		# the pinned bishop can't leave the file, the pinned knight can't move at all
+		self.assertFalse(move.is_move_legal(board, True, 4, 6, 3, 5))
+		self.assertFalse(move.is_move_legal(board, True, 2, 5, 3, 3))
+		self.assertTrue(move.is_move_legal(board, True, 4, 7, 3, 7))
+		# attacked by the knight
+		self.assertFalse(move.is_move_legal(board, True, 4, 7, 5, 7))
+
+		board = Board([
+			'____k___',
+			'________',
+			'________',
+			'________',
+			'R___q___',
+			'_____n__',
+			'________',
+			'____K___',
+		])
+
+		info = bitboard.compute_check_info(board, True)
+
+		self.assertTrue(info.is_double_check())
+		self.assertEqual(info.evasions, 0)
+		# the rook could capture the queen, but the knight would still give check
+		self.assertFalse(move.is_move_legal(board, True, 0, 4, 4, 4))
+		self.assertTrue(move.is_move_legal(board, True, 4, 7, 3, 7))
+		self.assertFalse(move.is_move_legal(board, True, 4, 7, 3, 6))
+		self.assertFalse(move.is_move_legal(board, True, 4, 7, 4, 6))
+
+		self.assertFalse(bitboard.compute_check_info(board, False).is_check())
+
+		# the king can't step back along the line of the check
+		board = Board([
+			'____r___',
+			'________',
+			'________',
+			'________',
+			'________',
+			'________',
+			'____K___',
+			'k_______',
+		])
+
+		self.assertFalse(move.is_move_legal(board, True, 4, 6, 4, 7))
+		self.assertTrue(move.is_move_legal(board, True, 4, 6, 3, 7))
+
+	def test_square_tables(self):
+		to_bits = lambda squares: sum(1 << square for square in squares)
+
+		for square in range(64):
+			self.assertEqual(to_bits(bitboard.KNIGHT_TARGETS[square]), bitboard.KNIGHT_ATTACKS[square])
+			self.assertEqual(to_bits(bitboard.KING_TARGETS[square]), bitboard.KING_ATTACKS[square])
+
+			for direction in range(8):
+				self.assertEqual(to_bits(bitboard.RAY_SQUARES[direction][square]), bitboard.RAYS[direction][square])
+
+		# nearest square first, a1 -> a2 ... a8
+		self.assertEqual(bitboard.RAY_SQUARES[bitboard.DIRECTION_INDEX[(0, -1)]][Board.to_square(0, 7)], (48, 40, 32, 24, 16, 8, 0))
+
+
+	def test_piece_positions(self):
+		board = Board([
+			'____k___',
+			'_P_p____',
+			'________',
+			'____P___',
+			'________',
+			'________',
+			'________',
+			'____K___',
+		])
+
+		move.execute_a_move(board, [(3, 1, 3, 3)])
+		move.execute_a_move(board, [(4, 3, 3, 2)]) # en passant
+		move.execute_a_move(board, [(1, 1, 1, 0)]) # promotion
+
+		self.assertEqual(board.get_pieces_positions(Piece.TYPE_PAWN, False), ())
+		self.assertEqual(board.get_pieces_positions(Piece.TYPE_PAWN, True), ((3, 2),))
+		self.assertEqual(board.get_pieces_positions(Piece.TYPE_QUEEN, True), ((1, 0),))
+		self.assertEqual(board.get_king_position(False), (4, 0))
+		self.assertEqual(board.get_all_pieces_positions(), [(1, 0), (3, 2), (4, 0), (4, 7)])
+
+	def test_make_and_unmake_move(self):
+
+		def state(board: Board) -> tuple:
+			return (bytes(board.squares), board.bitboards.copy(), board.occupancy.copy(),
+				board.moved_pieces.copy(), board.en_passant_position, board.zobrist_key)
+
+		board = Board([
+			'r___k__r',
+			'_P_p____',
+			'________',
+			'____P___',
+			'________',
+			'________',
+			'________',
+			'R___K__R',
+		])
+
+		moves = [
+			[(3, 1, 3, 3)],
+			[(4, 3, 3, 2)], # en passant
+			[(0, 0, 1, 0)],
+			[(1, 1, 1, 0)], # capture and promotion
+			[(4, 0, 6, 0), (7, 0, 5, 0)], # castling
+		]
+
+		for move_steps in moves:
+			before = state(board)
+
+			move.make_move(board, move_steps)
+			after = state(board)
+			move.unmake_move(board)
+
+			self.assertEqual(state(board), before)
+			self.assertEqual(board.undo_stack, [])
+
+			move.execute_a_move(board, move_steps)
+			self.assertEqual(state(board), after)
+
+	def test_attack_maps(self):
+		board = Board([
+			'r___k__r',
+			'_P_p____',
+			'________',
+			'____P___',
+			'__b_____',
+			'________',
+			'___Q____',
+			'R___K__R',
+		])
+
+		maps = bitboard.get_attack_maps(board)
+
+		self.assertIs(board.attack_maps, maps)
+		self.assertEqual(maps.get_count(Board.to_square(3, 0), False), 2) # the king and the rook
+		self.assertEqual(maps.get_count(Board.to_square(3, 7), True), 3) # the king, the queen and the rook
+		self.assertEqual(maps.get_count(Board.to_square(1, 0), True), 0)
+
+		moves = [
+			[(3, 1, 3, 3)],
+			[(4, 3, 3, 2)], # en passant
+			[(2, 4, 3, 5)], # the bishop blocks the queen
+			[(1, 1, 1, 0)], # promotion
+			[(0, 0, 1, 0)], # capture
+			[(4, 7, 6, 7), (7, 7, 5, 7)], # castling
+			[(3, 5, 3, 6)], # captures the queen
+		]
+
+		for move_steps in moves:
+			move.make_move(board, move_steps)
+			self.assertEqual(board.attack_maps.planes, bitboard.compute_attack_maps(board).planes)
+			move.unmake_move(board)
+			self.assertEqual(board.attack_maps.planes, bitboard.compute_attack_maps(board).planes)
+
+			move.execute_a_move(board, move_steps)
+			self.assertEqual(board.attack_maps.planes, bitboard.compute_attack_maps(board).planes)
+
+			for square in range(64):
+				for by_white in (True, False):
+					self.assertEqual(
+						bitboard.is_square_attacked(board, square, by_white),
+						not board.occupancy[by_white] >> square & 1 and bitboard.get_attackers(board, square, by_white) != 0
+					)
+
+		self.assertEqual(board.copy().attack_maps.planes, board.attack_maps.planes)
+
 
 if __name__ == '__main__':
 	unittest.main()
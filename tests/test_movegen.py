@@ -0,0 +1,50 @@
+import questionable_import
+
+import unittest
+import movegen
+from data_types import Board
+
+
+class TestMovegen(unittest.TestCase):
+
+	def test_generate_legal_moves(self):
+		board = Board([
+			'____k___',
+			'____r___',
+			'________',
+			'________',
+			'________',
+			'________',
+			'____B___',
+			'R___K___',
+		])
+
+		moves = movegen.generate_legal_moves(board, True)
+
+		# the bishop is pinned, castling is possible
+		self.assertNotIn((4, 6), [move_steps[0][:2] for move_steps in moves])
+		self.assertIn([(4, 7, 2, 7), (0, 7, 3, 7)], moves)
+		self.assertEqual(len(moves), 4 + 10 + 1)
+
+		# the search keeps attack maps on its own copy of the board only
+		fen = board.to_fen()
+		self.assertEqual(movegen.perft(board, True, 2), movegen.count_nodes(board.copy(), True, 2))
+		self.assertIsNone(board.attack_maps)
+		self.assertEqual(board.to_fen(), fen)
+
+	def test_perft(self):
+		for name, board_data, is_white, expected in movegen.PERFT_POSITIONS:
+			for depth in (1, 2):
+				self.assertEqual(movegen.perft(Board(board_data), is_white, depth), expected[depth - 1], f'{name} at depth {depth}')
+
+		# castling rights from the FEN
+		kiwipete = 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1'
+		self.assertEqual(movegen.perft(Board.from_fen(kiwipete), True, 2), 2039)
+		self.assertEqual(movegen.perft(Board.from_fen(kiwipete.replace('KQkq', '-')), True, 1), 46)
+
+		name, board_data, is_white, expected = movegen.PERFT_POSITIONS[2]
+		self.assertEqual(movegen.perft(Board(board_data), is_white, 3), expected[2])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,60 @@
+import questionable_import
+
+import os
+import shutil
+import tempfile
+import unittest
+import opening_tree
+
+
+class TestOpeningTree(unittest.TestCase):
+
+	def test_lookup(self):
+		tree = opening_tree.build_opening_tree('tests/data/Adams 10.pgn')
+
+		entries = tree.lookup_moves([])
+		self.assertEqual([(move, len(games)) for move, games, _ in entries], [('e4', 9), ('d4', 1)])
+
+		move, games, results = tree.lookup_moves(['e4', 'e6'])[0]
+		self.assertEqual((move, games, results), ('d4', [0, 1], ['1-0', '1-0']))
+
+		self.assertEqual(tree.lookup_moves(['a3', 'a6', 'a4']), [])
+		self.assertIsInstance(tree.lookup_moves(['e5']), Exception)
+
+		fen = 'rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2'
+		self.assertEqual(tree.lookup_fen(fen), tree.lookup_moves(['e4', 'e6']))
+
+		# after a double push, that no pawn can capture en passant, FENs with and without the square are the same position
+		after_e4 = tree.lookup_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1')
+		self.assertEqual(sum(len(games) for _, games, _ in after_e4), 9)
+		self.assertEqual(after_e4, tree.lookup_fen('rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'))
+		self.assertIsInstance(tree.lookup_fen('8/8/8/8/8/8/8/8 w - -'), Exception)
+
+		shallow = opening_tree.build_opening_tree('tests/data/Adams 10.pgn', max_plies=2)
+		self.assertEqual(shallow.lookup_moves([]), entries)
+		self.assertEqual(len(shallow), 20)
+
+	def test_save_and_load(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		shutil.copy('tests/data/Adams 10.pgn', path)
+
+		tree = opening_tree.load_opening_tree(path)
+		self.assertTrue(os.path.exists(path + opening_tree.OPENING_TREE_EXTENSION))
+
+		loaded = opening_tree.OpeningTree.load(path + opening_tree.OPENING_TREE_EXTENSION, os.stat(path))
+		self.assertEqual(loaded.moves, tree.moves)
+		self.assertEqual(loaded.keys, tree.keys)
+		self.assertEqual(loaded.games, tree.games)
+		self.assertEqual(loaded.lookup_moves(['e4']), tree.lookup_moves(['e4']))
+
+		with open(path, 'a') as file:
+			file.write('\n')
+
+		self.assertIsNone(opening_tree.OpeningTree.load(path + opening_tree.OPENING_TREE_EXTENSION, os.stat(path)))
+
+
+if __name__ == '__main__':
+	unittest.main()
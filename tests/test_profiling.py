@@ -0,0 +1,47 @@
+import questionable_import
+
+import os
+import unittest
+from unittest import mock
+import game
+import move
+import input_parser
+import profiling
+
+
+class TestProfiling(unittest.TestCase):
+
+	def test_enable_and_disable(self):
+		original = move.is_position_attacked
+
+		profiling.enable(report_at_exit=False)
+		self.addCleanup(profiling.disable)
+		profiling.reset()
+
+		self.assertTrue(profiling.is_enabled())
+		self.assertIsNot(move.is_position_attacked, original)
+
+		input_parser.MOVE_CACHE.clear()
+		g = game.game_from_moves(['e4', 'e5', 'Nf3', 'Nc6', 'Bb5', 'a6'])
+
+		self.assertIsInstance(g, game.Game)
+		self.assertEqual(profiling.STATS['input_parser.parse_and_complete'].calls, 6)
+		self.assertEqual(profiling.STATS['move.execute_a_move'].calls, 6)
+		self.assertGreater(profiling.STATS['move.create_piece_mask'].seconds, 0)
+
+		profiling.disable()
+
+		self.assertFalse(profiling.is_enabled())
+		self.assertIs(move.is_position_attacked, original)
+
+	def test_is_requested(self):
+		with mock.patch.dict(os.environ, {profiling.PROFILE_ENVIRONMENT_VARIABLE: '0'}):
+			self.assertTrue(profiling.is_requested(['main.py', '--bench', '--profile']))
+			self.assertFalse(profiling.is_requested(['main.py', '--bench']))
+
+		with mock.patch.dict(os.environ, {profiling.PROFILE_ENVIRONMENT_VARIABLE: '1'}):
+			self.assertTrue(profiling.is_requested(['main.py', '--bench']))
+
+
+if __name__ == '__main__':
+	unittest.main()
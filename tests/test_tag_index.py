@@ -0,0 +1,63 @@
+import questionable_import
+
+import os
+import shutil
+import tempfile
+import unittest
+import game
+import tag_index
+
+
+class TestTagIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.table = tag_index.build_tag_table('tests/data/Adams 10.pgn')
+
+	def test_build_tag_table(self):
+		self.assertEqual(len(self.table), 10)
+		self.assertEqual(self.table.offsets, game.build_pgn_index('tests/data/Adams 10.pgn'))
+		self.assertEqual(self.table.columns['ECO'][0], 'C05')
+		self.assertEqual(self.table.get_tags(2)['Black'], 'Adams, Michael')
+		self.assertNotIn('WhiteElo', self.table.get_tags(0))
+
+		self.assertEqual(len(tag_index.build_tag_table('tests/data/no_meta.pgn')), 1)
+		self.assertEqual(len(tag_index.build_tag_table('tests/data/empty.pgn')), 0)
+
+	def test_filter(self):
+		def indexes(*filters: str) -> list[int]:
+			return self.table.filter([tag_index.parse_filter(f) for f in filters])
+
+		self.assertEqual(indexes('White=adams', 'ECO=C0*'), [0, 1])
+		self.assertEqual(indexes('Black=Adams'), [2, 3, 7, 9])
+		self.assertEqual(indexes('BlackElo>=2230', 'BlackElo<2300'), [1])
+		self.assertEqual(indexes('Annotator=x'), [])
+		self.assertIsInstance(tag_index.parse_filter('White'), Exception)
+
+	def test_load_tag_table(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		shutil.copy('tests/data/Adams 10.pgn', path)
+
+		self.assertEqual(tag_index.load_tag_table(path).columns, self.table.columns)
+		self.assertTrue(os.path.exists(path + tag_index.TAG_INDEX_EXTENSION))
+		self.assertEqual(tag_index.load_tag_table(path).offsets, self.table.offsets)
+
+	def test_byte_order_mark(self):
+		directory = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, directory)
+
+		path = os.path.join(directory, 'games.pgn')
+		with open('tests/data/Adams 10.pgn', 'rb') as source, open(path, 'wb') as file:
+			file.write(tag_index.BYTE_ORDER_MARK + source.read())
+
+		table = tag_index.build_tag_table(path)
+
+		self.assertEqual(table.columns, self.table.columns)
+		self.assertEqual(table.offsets, game.build_pgn_index(path))
+		self.assertEqual(table.filter([tag_index.parse_filter('Event=Lloyds')])[:1], [0])
+
+
+if __name__ == '__main__':
+	unittest.main()